@@ -1,6 +1,6 @@
 """ UI HUD elements (time, score...) """
 
-from tilengine import Tileset, Tilemap, Tile
+from tilengine import Tilemap, Tile
 import game
 
 class UI(object):
@@ -8,17 +8,18 @@ class UI(object):
 	def __init__(self):
 		self.cols = game.WIDTH//8
 		self.layer = game.engine.layers[0]
-		self.layer.setup(Tilemap.create(4, self.cols, None), Tileset.fromfile("ui.tsx"))
+		self.layer.setup(Tilemap.create(4, self.cols, None), game.assets.tilesets["ui.tsx"])
 		self.layer.set_clip(0, 0, game.WIDTH, 32)
 
 	def update_time(self, time):
 		text = "{:03}".format(time)
-		col = (self.cols - len(text)) // 2
-		tile = Tile()
-		for digit in text:
-			base_index = int(digit)
-			tile.index = base_index + 11
-			self.layer.tilemap.set_tile(1, col, tile)
-			tile.index = base_index + 21
-			self.layer.tilemap.set_tile(2, col, tile)
-			col += 1
+		self.print_number((self.cols - len(text)) // 2, text)
+
+	def print_number(self, col, text):
+		""" prints a string of digits with the big font, starting at given column """
+		num_cols = len(text)
+		tiles = (Tile * (num_cols * 2))()
+		for n, digit in enumerate(text):
+			tiles[n].index = int(digit) + 11
+			tiles[num_cols + n].index = int(digit) + 21
+		self.layer.tilemap.set_tiles(1, col, 2, num_cols, tiles)
@@ -0,0 +1,86 @@
+"""
+Activity management by camera distance: enemies a bit away from the screen are put to
+sleep (not updated, sprite disabled) and woken up when they come back, farther ones are
+despawned back to their item so they can spawn again when it's on screen. Applies both to
+enemy actors and to the enemies of swarms
+"""
+
+import game
+
+class ActivityManager(object):
+	""" Sleeps, wakes and despawns actors of the enemies group depending on their distance to
+	the screen: sleep beyond sleep_margin pixels, despawn beyond despawn_margin pixels """
+	def __init__(self, sleep_margin=64, despawn_margin=320):
+		self.sleep_margin = sleep_margin
+		self.despawn_margin = despawn_margin
+		self.sleeping = dict()
+		game.actors.add(self)
+
+	def distance(self, x, width):
+		""" returns horizontal distance in pixels from an object at x to the screen, 0 if on screen """
+		x1 = game.world.x
+		x2 = x1 + game.WIDTH
+		if x + width < x1:
+			return x1 - x - width
+		if x > x2:
+			return x - x2
+		return 0
+
+	def despawn(self, actor):
+		""" removes actor and lets its item spawn again """
+		game.actors.remove(actor)
+		game.enemy_grid.remove(actor)
+		self.sleeping.pop(actor, None)
+		actor.release()
+
+	def update(self):
+		""" checks awake and sleeping enemies once per frame, before they're updated """
+		for actor in game.actors.group("enemies"):
+			distance = self.distance(actor.x, actor.size[0])
+			if distance > self.despawn_margin:
+				self.despawn(actor)
+			elif distance > self.sleep_margin:
+				game.actors.remove(actor)
+				game.enemy_grid.remove(actor)
+				actor.sleep()
+				self.sleeping[actor] = None
+
+		for actor in tuple(self.sleeping):
+			distance = self.distance(actor.x, actor.size[0])
+			if distance > self.despawn_margin:
+				self.despawn(actor)
+			elif distance <= self.sleep_margin:
+				del self.sleeping[actor]
+				actor.wake()
+				game.enemy_grid.update(actor, actor.rectangle)
+				game.actors.add(actor)
+
+		if game.swarms is not None:
+			for swarm in game.swarms.values():
+				self.update_swarm(swarm)
+		return True
+
+	def update_swarm(self, swarm):
+		""" checks awake and sleeping enemies of a swarm """
+		width = swarm.size[0]
+		n = 0
+		while n < swarm.count:
+			distance = self.distance(swarm.x[n], width)
+			if distance > self.despawn_margin:
+				swarm.despawn(n)
+			elif distance > self.sleep_margin:
+				swarm.sleep(n)
+			else:
+				n += 1
+
+		for item, (x, state, sprite) in tuple(swarm.sleeping.items()):
+			distance = self.distance(x, width)
+			if distance > self.despawn_margin:
+				swarm.despawn_sleeping(item)
+			elif distance <= self.sleep_margin:
+				swarm.wake(item)
+
+	def clear(self):
+		""" despawns all sleeping actors, i.e. when changing level """
+		for actor in tuple(self.sleeping):
+			self.despawn(actor)
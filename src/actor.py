@@ -6,24 +6,94 @@ class Direction:
 	""" player orientations """
 	Right, Left = range(2)
 
+class SpriteCategory:
+	""" sprite budget categories """
+	Score, Effect, Enemy, Player = range(4)
+
+class OutOfSprites(Exception):
+	""" raised when an actor can't get a sprite """
+
+class SpriteAllocator(object):
+	""" Hands out sprite slots from a free list, with a budget for each category.
+	Budgets add up to game.MAX_SPRITES, so every category always gets its share """
+	budgets = {
+		SpriteCategory.Score: 6,
+		SpriteCategory.Effect: 8,
+		SpriteCategory.Enemy: 16,
+		SpriteCategory.Player: 2
+	}
+
+	def __init__(self, sprites, budgets=None):
+		self.sprites = sprites
+		if budgets is not None:
+			self.budgets = budgets
+		self.free = list(reversed(range(len(sprites))))
+		self.owners = dict((category, dict()) for category in self.budgets)
+
+	def can_allocate(self, category):
+		""" returns if a sprite of the given category would be granted """
+		return len(self.owners[category]) < self.budgets[category] and len(self.free) > 0
+
+	def allocate(self, owner, category):
+		""" returns a Sprite for owner, or None if not possible """
+		if not self.can_allocate(category):
+			return None
+		sprite = self.sprites[self.free.pop()]
+		self.owners[category][owner] = sprite
+		return sprite
+
+	def reserve(self, category, count):
+		""" takes sprites out of the free list for permanent use, charged to the category budget """
+		if count > self.budgets[category] - len(self.owners[category]) or count > len(self.free):
+			raise OutOfSprites(category)
+		self.budgets = dict(self.budgets)
+		self.budgets[category] -= count
+		return [self.sprites[self.free.pop()] for n in range(count)]
+
+	def release(self, owner, category):
+		""" disables sprite of owner and returns it to the free list """
+		sprite = self.owners[category].pop(owner, None)
+		if sprite is not None:
+			sprite.disable()
+			self.free.append(sprite.index)
+
+
 class Actor(object):
 	""" Generic active game entity base class """
 	spriteset = None
+	category = SpriteCategory.Enemy
+	groups = ()
+
 	def __init__(self, item_ref, x, y):
 		self.x = x
 		self.y = y
-		self.sprite = game.engine.sprites[game.engine.get_available_sprite()]
-		self.sprite.setup(self.spriteset)
 		self.item = item_ref
-		game.actors.append(self)
+		self.sprite = game.sprites.allocate(self, self.category)
+		if self.sprite is None:
+			raise OutOfSprites(type(self).__name__)
+		self.sprite.setup(self.spriteset)
+		game.actors.add(self)
 
-	def __del__(self):
-		self.sprite.disable()
+	def release(self):
+		""" returns sprite to allocator and lets its item spawn again. Called when removed """
+		if self.sprite is not None:
+			game.sprites.release(self, self.category)
+			self.sprite = None
 		if self.item is not None:
 			self.item.alive = False
 
+	def sleep(self):
+		""" stops drawing while the actor isn't updated, keeping its sprite """
+		self.sprite.disable()
+
+	def wake(self):
+		""" resumes drawing after sleep() """
+		self.sprite.setup(self.spriteset)
+
 	def kill(self):
 		""" definitive kill of active game entity, removing from spawn-able item list too """
 		game.world.objects.remove(self.item)
+		game.enemy_grid.remove(self)
 		self.item = None
 		game.actors.remove(self)
+		self.release()
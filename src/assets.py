@@ -0,0 +1,89 @@
+"""
+Preloads every game resource in a single pass at startup: spritesets, sequences,
+palettes, tilemaps, tilesets and sounds, so nothing is loaded from disk during
+gameplay. Two optional packs are used when present in the assets path:
+- assets.dat, a Tilengine resource pack made with the ResourcePacker tool distributed with
+  Tilengine, for the graphic resources. It's kept open so levels loaded later read it too
+- assets.pak, built by pack.py and memory-mapped, for the data read by python code: sounds,
+  decoded tile layers, object layers and tile types
+"""
+
+import os
+from tilengine import Spriteset, Sequence, Palette, Tilemap, Tileset
+from streaming import read_manifest
+from pack import Pack
+import game
+
+PACK_NAME = "assets.dat"
+
+SPRITESETS = ("hero", "effect_death", "effect_vanish", "enemy_eagle", "enemy_opossum", "score")
+
+# sequence name: (spriteset, base name of frames, delay)
+SEQUENCES = {
+	"idle": ("hero", "idle", 4),
+	"jump": ("hero", "jump", 24),
+	"run": ("hero", "run", 5),
+	"death": ("effect_death", "death-", 5),
+	"vanish": ("effect_vanish", "vanish", 4),
+	"fly": ("enemy_eagle", "fly", 6),
+	"walk": ("enemy_opossum", "opossum-", 6)
+}
+
+TILEMAPS = ("layer_foreground.tmx", "layer_background.tmx")
+TILESETS = ("ui.tsx",)
+PALETTES = ("hero_alt.act",)
+
+# sound name: file name
+SOUNDS = {
+	"jump": "jump.wav",
+	"crush": "crunch.wav",
+	"pickup": "pickup.wav",
+	"hurt": "hurt.wav",
+	"eagle": "vulture.wav"
+}
+
+class Assets(object):
+	""" preloaded game resources, indexed by name """
+	def __init__(self):
+		self.spritesets = dict()
+		self.sequences = dict()
+		self.tilemaps = dict()
+		self.tilesets = dict()
+		self.palettes = dict()
+		self.pack = None
+		self.resource_pack = False
+
+	def load(self, path, sounds):
+		""" loads all resources, sound effects into given Sound instance """
+		pack_name = os.path.join(path, PACK_NAME)
+		self.resource_pack = os.path.isfile(pack_name)
+		if self.resource_pack:
+			game.engine.open_resource_pack(pack_name)
+		self.pack = Pack.open(path)
+
+		for name in SPRITESETS:
+			self.spritesets[name] = Spriteset.fromfile(name)
+		for name, (spriteset, basename, delay) in SEQUENCES.items():
+			self.sequences[name] = Sequence.create_sprite_sequence(self.spritesets[spriteset], basename, delay)
+		for name in TILEMAPS:
+			# levels split in chunks are streamed by World instead
+			if read_manifest(os.path.join(path, name)) is None:
+				self.tilemaps[name] = Tilemap.fromfile(name)
+		for name in TILESETS:
+			self.tilesets[name] = Tileset.fromfile(name)
+		for name in PALETTES:
+			self.palettes[name] = Palette.fromfile(name)
+
+		for name, file_name in SOUNDS.items():
+			data = self.pack.sound(file_name) if self.pack is not None else None
+			if data is not None:
+				sounds.load_buffer(name, data)
+			else:
+				sounds.load(name, file_name)
+
+	def close(self):
+		""" closes the packs, resources not loaded yet can't be read from them anymore """
+		if self.resource_pack:
+			game.engine.close_resource_pack()
+			self.resource_pack = False
+		self.pack = None
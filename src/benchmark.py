@@ -0,0 +1,179 @@
+"""
+Benchmarks of the hot paths: tilengine wrapper calls, raster program, entity updates,
+the same eagles updated as actors and as a swarm, and full headless frames with a number
+of enemies. Results are written as JSON and compared against a baseline, failing when any
+benchmark is slower than its allowed threshold
+
+Usage: python benchmark.py [--output FILE] [--baseline FILE] [--save-baseline FILE]
+	[--threshold RATIO] [--limit NAME=RATIO ...] [--enemies N] [--repeat N]
+"""
+
+import sys
+import json
+import argparse
+from timeit import Timer
+from itertools import count
+from tilengine import Window, Input, Tile, TileInfo
+from headless import HeadlessWindow
+from actor import SpriteCategory
+from eagle import Eagle
+from swarm import EagleSwarm
+from world import Item
+import platformer
+import game
+
+DEFAULT_THRESHOLD = 0.10	# allowed slowdown ratio against baseline
+
+def setup(num_enemies):
+	""" starts a headless game with the given number of enemies on screen, capped to half the
+	enemy sprite budget: the other half is for the swarm benchmark. Returns number of enemies
+	actually spawned """
+	platformer.init()
+	game.window = HeadlessWindow()
+	game.world.start()
+	sprites = game.sprites
+	available = sprites.budgets[SpriteCategory.Enemy] - len(sprites.owners[SpriteCategory.Enemy])
+	num_enemies = min(num_enemies, available // 2)
+	for n in range(num_enemies):
+		item = spawn_item(game.world.x + 80 + n*32, 40 + Eagle.size[1])
+		Eagle(item, item.x, item.y - Eagle.size[1])
+	return num_enemies
+
+def spawn_item(x, y):
+	""" returns a new live eagle item, added to the level so it can be killed """
+	item = Item(Item.Eagle, x, y)
+	item.alive = True
+	game.world.objects.add(item)
+	return item
+
+def bench_set_position():
+	sprite = game.engine.sprites[game.MAX_SPRITES - 1]
+	counter = count()
+	return lambda: sprite.set_position(next(counter) & 255, 0)
+
+def bench_layer_get_tile():
+	layer = game.world.foreground
+	tile_info = TileInfo()
+	return lambda: layer.get_tile(100, 200, tile_info)
+
+def bench_tilemap_set_tile():
+	tilemap = game.world.background.tilemap
+	tile = Tile()
+	tilemap.get_tile(0, 0, tile)
+	return lambda: tilemap.set_tile(0, 0, tile)
+
+def bench_get_input():
+	window = Window()
+	return lambda: window.get_input(Input.RIGHT)
+
+def bench_raster_frame():
+	run = game.raster.table.run
+	lines = range(game.HEIGHT)
+	def frame():
+		for line in lines:
+			run(line)
+	return frame
+
+def bench_player_update():
+	return game.player.update
+
+def bench_world_update():
+	return game.world.update
+
+def bench_eagle_actors():
+	eagles = [actor for actor in game.actors.group("enemies") if isinstance(actor, Eagle)]
+	def update():
+		for eagle in eagles:
+			eagle.update()
+	return update
+
+def bench_eagle_swarm():
+	""" the eagles of bench_eagle_actors, copied into a swarm updated only here """
+	eagles = [actor for actor in game.actors.group("enemies") if isinstance(actor, Eagle)]
+	swarm = EagleSwarm(max(len(eagles), 1))
+	game.actors.remove(swarm)
+	for eagle in eagles:
+		swarm.spawn(spawn_item(eagle.x, eagle.y + Eagle.size[1]))
+	return swarm.update
+
+def bench_frame():
+	window = game.window
+	def frame():
+		window.process()
+		platformer.update()
+	return frame
+
+# name, factory of the timed function, calls per measure
+BENCHMARKS = (
+	("sprite.set_position", bench_set_position, 10000),
+	("layer.get_tile", bench_layer_get_tile, 10000),
+	("tilemap.set_tile", bench_tilemap_set_tile, 10000),
+	("window.get_input", bench_get_input, 10000),
+	("raster.frame", bench_raster_frame, 100),
+	("player.update", bench_player_update, 1000),
+	("world.update", bench_world_update, 1000),
+	("frame", bench_frame, 100),
+	("eagles.actors", bench_eagle_actors, 1000),
+	("eagles.swarm", bench_eagle_swarm, 1000)
+)
+
+def run(num_enemies=8, repeat=5):
+	""" runs all benchmarks, returns number of enemies and dictionary of name: best seconds per call """
+	num_enemies = setup(num_enemies)
+	results = dict()
+	for name, factory, number in BENCHMARKS:
+		timer = Timer(factory())
+		results[name] = min(timer.repeat(repeat, number)) / number
+	return num_enemies, results
+
+def compare(results, baseline, threshold, limits):
+	""" returns list of (name, ratio, allowed) of benchmarks slower than allowed """
+	regressions = list()
+	for name, seconds in results.items():
+		reference = baseline.get(name)
+		if not reference:
+			continue
+		ratio = seconds / reference
+		allowed = limits.get(name, threshold)
+		if ratio > 1 + allowed:
+			regressions.append((name, ratio, allowed))
+	return regressions
+
+def parse_limit(text):
+	name, ratio = text.split("=")
+	return name, float(ratio)
+
+def main():
+	parser = argparse.ArgumentParser(description="Benchmarks game hot paths")
+	parser.add_argument("--output", metavar="FILE", help="writes results as JSON")
+	parser.add_argument("--baseline", metavar="FILE", help="compares against stored results")
+	parser.add_argument("--save-baseline", metavar="FILE", help="stores results as new baseline")
+	parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="allowed slowdown ratio")
+	parser.add_argument("--limit", metavar="NAME=RATIO", type=parse_limit, action="append", default=[],
+		help="allowed slowdown ratio of one benchmark")
+	parser.add_argument("--enemies", type=int, default=8, help="enemies on screen in frame benchmark")
+	parser.add_argument("--repeat", type=int, default=5, help="measures per benchmark, best is kept")
+	args = parser.parse_args()
+
+	num_enemies, results = run(args.enemies, args.repeat)
+	if num_enemies < args.enemies:
+		print("enemies capped to %d, half the sprite budget" % num_enemies)
+	report = {"enemies": num_enemies, "results": results}
+	for name, seconds in results.items():
+		print("%-20s %10.2f us" % (name, seconds * 1e6))
+	for filename in (args.output, args.save_baseline):
+		if filename:
+			with open(filename, "w") as file:
+				json.dump(report, file, indent=1)
+
+	if args.baseline:
+		with open(args.baseline) as file:
+			baseline = json.load(file)["results"]
+		regressions = compare(results, baseline, args.threshold, dict(args.limit))
+		for name, ratio, allowed in regressions:
+			print("%s: %.0f%% slower than baseline, %.0f%% allowed" % (name, (ratio - 1)*100, allowed*100))
+		if regressions:
+			sys.exit(1)
+
+if __name__ == "__main__":
+	main()
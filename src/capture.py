@@ -0,0 +1,130 @@
+"""
+Framebuffer access and background frame capture for off-screen rendering. Frames are
+rendered directly into a ring of shared memory slots and handed to a worker process that
+writes PNG sequences or raw video. When no slot is free the frame isn't captured, so the
+game loop never waits for encoding, unless lossless mode is set: then it waits for a slot
+and every frame is written. A stride captures only one of every N frames
+"""
+
+import os
+import struct
+from zlib import compress, crc32
+from queue import Empty
+from ctypes import c_ubyte
+from multiprocessing import Process, Queue
+from multiprocessing.shared_memory import SharedMemory
+
+class Framebuffer(object):
+	""" 32-bit BGRA render target with memoryview access to its pixels, without copies """
+	def __init__(self, width, height, buffer=None):
+		self.width = width
+		self.height = height
+		self.pitch = width * 4
+		if buffer is None:
+			buffer = (c_ubyte * (self.pitch * height))()
+		self.buffer = buffer
+		self.view = memoryview(buffer).cast("B")
+
+	def attach(self, engine):
+		""" sets as render target of engine """
+		engine.set_render_target(self.buffer, self.pitch)
+
+	def pixels(self):
+		""" returns memoryview of 32-bit pixels indexed by [y, x] """
+		return self.view.cast("I", (self.height, self.width))
+
+
+def png_chunk(kind, data):
+	return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", crc32(kind + data))
+
+def encode_png(data, width, height):
+	""" returns PNG file contents of a BGRA frame """
+	rgb = bytearray(width * height * 3)
+	rgb[0::3] = data[2::4]
+	rgb[1::3] = data[1::4]
+	rgb[2::3] = data[0::4]
+	stride = width * 3
+	rows = b"".join(b"\0" + rgb[y*stride:(y + 1)*stride] for y in range(height))
+	header = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+	return (b"\x89PNG\r\n\x1a\n" + png_chunk(b"IHDR", header) +
+		png_chunk(b"IDAT", compress(rows, 1)) + png_chunk(b"IEND", b""))
+
+def worker(name, width, height, directory, format, work, free):
+	""" capture process: copies each submitted slot, releases it and writes the frame """
+	memory = SharedMemory(name)
+	size = width * height * 4
+	raw = open(os.path.join(directory, "capture.raw"), "wb") if format == "raw" else None
+	while True:
+		job = work.get()
+		if job is None:
+			break
+		slot, num_frame = job
+		data = bytes(memory.buf[slot*size:(slot + 1)*size])
+		free.put(slot)
+		if raw is not None:
+			raw.write(data)
+		else:
+			with open(os.path.join(directory, "frame%06d.png" % num_frame), "wb") as file:
+				file.write(encode_png(data, width, height))
+	if raw is not None:
+		raw.close()
+	memory.close()
+
+
+class Capture(object):
+	""" Ring of framebuffers in shared memory, encoded by a background process.
+	Format is "png" for one file per frame, or "raw" for consecutive BGRA frames in one file.
+	Lossless waits for a free slot instead of dropping the frame, stride captures one of every N frames """
+	def __init__(self, directory, width, height, slots=8, format="png", lossless=False, stride=1):
+		os.makedirs(directory, exist_ok=True)
+		size = width * height * 4
+		self.memory = SharedMemory(create=True, size=size * slots)
+		self.framebuffers = [Framebuffer(width, height, (c_ubyte * size).from_buffer(self.memory.buf, slot*size))
+			for slot in range(slots)]
+		# slots not handed to the worker yet are tracked here: items put into a Queue reach
+		# the other end through a feeder thread, so they may not be there right after put()
+		self.unused = list(range(slots))
+		self.free = Queue()
+		self.work = Queue()
+		self.lossless = lossless
+		self.stride = stride
+		self.frame = 0
+		self.slot = None
+		self.captured = 0
+		self.dropped = 0
+		self.process = Process(target=worker, daemon=True,
+			args=(self.memory.name, width, height, directory, format, self.work, self.free))
+		self.process.start()
+
+	def acquire(self):
+		""" returns a free framebuffer to render next frame into, or None if all are busy or
+		the frame is skipped by the stride. In lossless mode waits for a busy one instead """
+		frame = self.frame
+		self.frame += 1
+		if frame % self.stride:
+			return None
+		if self.unused:
+			self.slot = self.unused.pop()
+		elif self.lossless:
+			self.slot = self.free.get()
+		else:
+			try:
+				self.slot = self.free.get_nowait()
+			except Empty:
+				self.dropped += 1
+				return None
+		return self.framebuffers[self.slot]
+
+	def submit(self, num_frame):
+		""" hands last acquired framebuffer to the worker once rendered """
+		self.work.put((self.slot, num_frame))
+		self.slot = None
+		self.captured += 1
+
+	def close(self):
+		""" waits for pending frames and releases shared memory. Render target must be changed before """
+		self.work.put(None)
+		self.process.join()
+		self.framebuffers = None
+		self.memory.close()
+		self.memory.unlink()
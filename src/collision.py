@@ -0,0 +1,124 @@
+""" Collision helpers: terrain map of tile types, and broadphase grid of actor hitboxes """
+
+from tilengine import TileInfo
+
+class CollisionMap(object):
+	""" tile types of a layer in a compact grid, for terrain queries without native calls """
+
+	def __init__(self, rows, cols, tile_size=16):
+		self.tile_size = tile_size
+		self.rows = rows
+		self.cols = cols
+		self.width = cols * tile_size
+		self.height = rows * tile_size
+		self.types = bytearray(rows * cols)
+
+	@classmethod
+	def fromlayer(cls, layer, tile_size=16):
+		""" creates map with the types of all the tiles of a layer """
+		collision_map = cls(layer.tilemap.rows, layer.tilemap.cols, tile_size)
+		tile_info = TileInfo()
+		for row in range(collision_map.rows):
+			for col in range(collision_map.cols):
+				layer.get_tile(col * tile_size, row * tile_size, tile_info)
+				collision_map.types[row * collision_map.cols + col] = tile_info.type
+		return collision_map
+
+	@classmethod
+	def fromtilemap(cls, tilemap, tile_types, tile_size=16):
+		""" creates map from the tiles of a tilemap and a table of types by tileset index """
+		return cls.fromtiles(tilemap.rows, tilemap.cols, tilemap.get_tiles(), tile_types, tile_size)
+
+	@classmethod
+	def fromtiles(cls, rows, cols, tiles, tile_types, tile_size=16):
+		""" creates map from a buffer of tiles (index, flags pairs of 16-bit values) and a table
+		of types by tileset index. Makes no native calls """
+		collision_map = cls(rows, cols, tile_size)
+		table = bytes(1) + bytes(tile_types)
+		indexes = memoryview(tiles).cast("B").cast("H")[0::2]
+		collision_map.types[:] = bytes(table[index] if index < len(table) else 0 for index in indexes)
+		return collision_map
+
+	def get_tile(self, x, y, tile_hit):
+		""" fills TileHit object with terrain at layer position x,y (wraps like the layer).
+		Reported column is the unwrapped one, so it stays a world column on ring maps """
+		y %= self.height
+		row = y // self.tile_size
+		col = x // self.tile_size
+		tile_hit.type = self.types[row * self.cols + col % self.cols]
+		tile_hit.row = row
+		tile_hit.col = col
+		tile_hit.xoffset = x % self.tile_size
+		tile_hit.yoffset = y % self.tile_size
+
+	def set_type(self, row, col, tile_type):
+		""" updates the type of a single tile (column wraps) """
+		self.types[row * self.cols + col % self.cols] = tile_type
+
+	def region(self, col, num_cols):
+		""" returns types of num_cols columns starting at col (wraps), all rows, in row-major order """
+		col %= self.cols
+		if col + num_cols > self.cols:
+			head = self.cols - col
+			return b"".join(self.types[start:start + head] + self.types[start - col:start - col + num_cols - head]
+				for start in range(col, len(self.types), self.cols))
+		return b"".join(self.types[start:start + num_cols]
+			for start in range(col, len(self.types), self.cols))
+
+	def set_region(self, col, num_cols, types):
+		""" writes types of num_cols columns starting at col, in row-major order """
+		for row in range(self.rows):
+			start = row * self.cols + col
+			self.types[start:start + num_cols] = types[row * num_cols:(row + 1) * num_cols]
+
+
+class CollisionGrid(object):
+	""" uniform grid of actor hitboxes, updated as actors move """
+	def __init__(self, cell_size=64):
+		self.cell_size = cell_size
+		self.cells = dict()
+		self.entries = dict()
+
+	def update(self, actor, rectangle):
+		""" registers or moves the hitbox (Rectangle) of an actor """
+		size = self.cell_size
+		cells = (rectangle.x1 // size, rectangle.y1 // size, rectangle.x2 // size, rectangle.y2 // size)
+		entry = self.entries.get(actor)
+		if entry is not None:
+			if entry[1] == cells:
+				return
+			self._unlink(actor, entry[1])
+		self.entries[actor] = (rectangle, cells)
+		col1, row1, col2, row2 = cells
+		for col in range(col1, col2 + 1):
+			for row in range(row1, row2 + 1):
+				cell = self.cells.get((col, row))
+				if cell is None:
+					cell = self.cells[(col, row)] = dict()
+				cell[actor] = None
+
+	def remove(self, actor):
+		""" unregisters an actor, does nothing if not registered """
+		entry = self.entries.pop(actor, None)
+		if entry is not None:
+			self._unlink(actor, entry[1])
+
+	def _unlink(self, actor, cells):
+		col1, row1, col2, row2 = cells
+		for col in range(col1, col2 + 1):
+			for row in range(row1, row2 + 1):
+				cell = self.cells[(col, row)]
+				del cell[actor]
+				if not cell:
+					del self.cells[(col, row)]
+
+	def query(self, x1, y1, x2, y2):
+		""" returns list of actors whose hitbox overlaps the given rectangle """
+		size = self.cell_size
+		found = dict()
+		for col in range(int(x1) // size, int(x2) // size + 1):
+			for row in range(int(y1) // size, int(y2) // size + 1):
+				cell = self.cells.get((col, row))
+				if cell is not None:
+					found.update(cell)
+		return [actor for actor in found if self.entries[actor][0].check_overlap(x1, y1, x2, y2)]
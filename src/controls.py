@@ -0,0 +1,64 @@
+""" Per-frame input snapshot with edge detection, on top of a rebindable action map """
+
+from tilengine import Input
+import game
+
+class Action:
+	""" game actions, bound to one or more inputs """
+	Left, Right, Jump = range(3)
+	count = 3
+
+DEFAULT_BINDINGS = {
+	Action.Left: (Input.LEFT,),
+	Action.Right: (Input.RIGHT,),
+	Action.Jump: (Input.A,)
+}
+
+PLAYER_INPUTS = (Input.P1, Input.P2, Input.P3, Input.P4)
+
+class Controls(object):
+	""" Samples the bound inputs of all players once per frame into a bitmask of actions,
+	with one bit for each (player, action) pair. Queries don't reach the window """
+
+	def __init__(self, num_players=1, bindings=None):
+		self.num_players = num_players
+		self.bindings = dict(DEFAULT_BINDINGS if bindings is None else bindings)
+		self.current = 0
+		self.previous = 0
+		self.compile()
+
+	def bind(self, action, *inputs):
+		""" replaces inputs bound to an action """
+		self.bindings[action] = inputs
+		self.compile()
+
+	def compile(self):
+		""" builds list of (input_id, action bit) pairs to sample """
+		self.polls = list()
+		for player in range(self.num_players):
+			for action, inputs in self.bindings.items():
+				bit = 1 << (player*Action.count + action)
+				for input_id in inputs:
+					self.polls.append((PLAYER_INPUTS[player] + input_id, bit))
+
+	def sample(self):
+		""" takes new snapshot of inputs, once at frame start """
+		get_input = game.window.get_input
+		state = 0
+		for input_id, bit in self.polls:
+			if get_input(input_id):
+				state |= bit
+		self.previous = self.current
+		self.current = state
+
+	def held(self, action, player=0):
+		""" returns if action is active in current frame """
+		return (self.current >> (player*Action.count + action)) & 1 == 1
+
+	def pressed(self, action, player=0):
+		""" returns if action has been activated this frame """
+		return ((self.current & ~self.previous) >> (player*Action.count + action)) & 1 == 1
+
+	def released(self, action, player=0):
+		""" returns if action has been deactivated this frame """
+		return ((self.previous & ~self.current) >> (player*Action.count + action)) & 1 == 1
@@ -1,29 +1,34 @@
 """ Flying enemy, waves across screen """
 
 from math import sin, radians
-from tilengine import Spriteset, Sequence, Flags
+from tilengine import Flags
 from actor import Actor, Direction
+from rectangle import Rectangle
 import game
 
 class Eagle(Actor):
 	""" Flying enemy """
 	size = (40, 40)
-	seq_fly = None
+	groups = ("enemies",)
 
 	def __init__(self, item_ref, x, y):
-		
-		# init class members once
-		if Eagle.spriteset is None:
-			Eagle.spriteset = Spriteset.fromfile("enemy_eagle")
-			Eagle.seq_fly = Sequence.create_sprite_sequence(Eagle.spriteset, "fly", 6)
-
+		self.spriteset = game.assets.spritesets["enemy_eagle"]
 		Actor.__init__(self, item_ref, x, y)
 		self.frame = 0
 		self.base_y = y
 		self.xspeed = -3
 		self.direction = Direction.Left
-		self.sprite.set_animation(Eagle.seq_fly, 0)
+		self.sprite.set_animation(game.assets.sequences["fly"], 0)
 		self.collision_points = (4, 20, 36)
+		self.rectangle = Rectangle(x, y, self.size[0], self.size[1])
+		game.enemy_grid.update(self, self.rectangle)
+
+	def wake(self):
+		""" resumes drawing after sleep() """
+		Actor.wake(self)
+		self.sprite.set_animation(game.assets.sequences["fly"], 0)
+		if self.direction is Direction.Right:
+			self.sprite.set_flags(Flags.FLIPX)
 
 	def update(self):
 		""" Update once per frame """
@@ -33,6 +38,8 @@ class Eagle(Actor):
 		if self.frame is 10:
 			game.sounds.play("eagle", 3)
 		screen_x = self.x - game.world.x
+		self.rectangle.update_position(self.x, self.y)
+		game.enemy_grid.update(self, self.rectangle)
 
 		if self.direction is Direction.Left:
 			if screen_x < 10:
@@ -41,8 +48,9 @@ class Eagle(Actor):
 				self.sprite.set_flags(Flags.FLIPX)
 				game.sounds.play("eagle", 3)
 			else:
-				for point in self.collision_points:
-					game.player.check_hit(self.x, self.y + point, self.direction)
+				for player in game.player_grid.query(self.x, self.y, self.x, self.y + self.size[1]):
+					for point in self.collision_points:
+						player.check_hit(self.x, self.y + point, self.direction)
 		else:
 			if screen_x > 590:
 				self.direction = Direction.Left
@@ -50,7 +58,9 @@ class Eagle(Actor):
 				self.sprite.set_flags(0)
 				game.sounds.play("eagle", 3)
 			else:
-				for point in self.collision_points:
-					game.player.check_hit(self.x + self.size[0], self.y + point, self.direction)
+				x = self.x + self.size[0]
+				for player in game.player_grid.query(x, self.y, x, self.y + self.size[1]):
+					for point in self.collision_points:
+						player.check_hit(x, self.y + point, self.direction)
 		self.sprite.set_position(screen_x, self.y)
 		return True
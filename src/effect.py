@@ -1,18 +1,41 @@
 """ Generic, reusable one-shot animation (explosions, vanish, smoke...) """
 
-from actor import Actor
+from actor import Actor, SpriteCategory
 import game
 
 class Effect(Actor):
-	""" placeholder for simple sprite effects """
-	def __init__(self, x, y, spriteset, sequence):
-		self.spriteset = spriteset
-		Actor.__init__(self, None, x, y)
+	""" placeholder for simple sprite effects, pooled: spawn with game.effects.spawn() """
+	category = SpriteCategory.Effect
+
+	def __init__(self, pool, sprite):
+		self.pool = pool
+		self.sprite = sprite
+		self.item = None
+		self.x = 0
+		self.y = 0
+		self.armed = False
+
+	def arm(self, x, y, spriteset, sequence):
+		""" restarts effect at given position """
+		self.x = x
+		self.y = y
+		if spriteset is not self.sprite.spriteset:
+			self.sprite.setup(spriteset)
 		self.sprite.set_animation(sequence, 1)
+		self.sprite.set_position(x - game.world.x, y)
+		self.armed = True
+
+	def release(self):
+		""" returns effect to its pool """
+		self.pool.recycle(self)
 
 	def update(self):
 		""" updates effect state once per frame """
 		self.sprite.set_position(self.x - game.world.x, self.y)
+		# in pipelined mode the animation set by arm() is applied at frame end, don't read it back yet
+		if self.armed:
+			self.armed = False
+			return True
 		if self.sprite.get_animation_state() is False:
 			return False
 		return True
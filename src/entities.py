@@ -0,0 +1,95 @@
+"""
+Entity store for active game entities: stable update order, generational handles,
+deferred removal and iteration by group (i.e. all the enemies) without type checks
+"""
+
+class EntityStore(object):
+	""" Container of game entities. Entities can be added and removed while iterating:
+	added ones are visited in the same pass, removed ones are skipped, and the storage
+	is compacted by flush() at frame end """
+
+	def __init__(self):
+		self.entities = list()
+		self.positions = dict()
+		self.handles = dict()
+		self.slots = list()
+		self.generations = list()
+		self.free = list()
+		self.groups = dict()
+		self.removed = list()
+
+	def __len__(self):
+		return len(self.positions)
+
+	def __contains__(self, entity):
+		return entity in self.positions
+
+	def __iter__(self):
+		""" iterates entities in insertion order, including the ones added meanwhile """
+		for entity in self.entities:
+			if entity is not None:
+				yield entity
+
+	def add(self, entity):
+		""" adds an entity, returns its handle """
+		if self.free:
+			slot = self.free.pop()
+		else:
+			slot = len(self.slots)
+			self.slots.append(None)
+			self.generations.append(0)
+		self.slots[slot] = entity
+		handle = (self.generations[slot] << 16) | slot
+		self.handles[entity] = handle
+		self.positions[entity] = len(self.entities)
+		self.entities.append(entity)
+		for name in getattr(entity, "groups", ()):
+			self.groups.setdefault(name, dict())[entity] = None
+		return handle
+
+	def remove(self, entity):
+		""" removes an entity, does nothing if not present. Storage is compacted in flush() """
+		index = self.positions.pop(entity, None)
+		if index is None:
+			return
+		self.entities[index] = None
+		handle = self.handles.pop(entity)
+		slot = handle & 0xFFFF
+		self.slots[slot] = None
+		self.generations[slot] += 1
+		self.free.append(slot)
+		self.removed.append(entity)
+
+	def get(self, handle):
+		""" returns entity of a handle, or None if it has been removed """
+		slot = handle & 0xFFFF
+		if slot < len(self.slots) and self.generations[slot] == handle >> 16:
+			return self.slots[slot]
+		return None
+
+	def handle(self, entity):
+		""" returns handle of an entity, or None if not present """
+		return self.handles.get(entity)
+
+	def group(self, name):
+		""" iterates entities that declare the given name in their groups attribute """
+		group = self.groups.get(name)
+		if group is None:
+			return
+		for entity in tuple(group):
+			if entity in self.positions:
+				yield entity
+
+	def flush(self):
+		""" applies pending removals, called once per frame outside iteration """
+		if not self.removed:
+			return
+		for entity in self.removed:
+			if entity in self.positions:
+				continue	# added again before flush
+			for name in getattr(entity, "groups", ()):
+				self.groups[name].pop(entity, None)
+		del self.removed[:]
+		self.entities = [entity for entity in self.entities if entity is not None]
+		for index, entity in enumerate(self.entities):
+			self.positions[entity] = index
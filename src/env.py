@@ -0,0 +1,125 @@
+"""
+Environment API for automated agents: reset() and step(action) over headless sessions,
+with a vectorized variant that steps several sessions in lockstep. Actions are bitmasks
+of controls.Action values, observations are the terrain collision grid on screen plus
+player and enemies positions
+"""
+
+from array import array
+from collections import namedtuple
+from controls import Action, DEFAULT_BINDINGS
+from session import Session
+import game
+
+MAX_ENEMIES = 16	# enemy slots in observation, unused ones are zero
+
+# terrain: memoryview of tile types indexed by [row, col], screen-sized
+# player: array of x, y, xspeed, yspeed, relative to screen
+# enemies: array of MAX_ENEMIES (x, y) pairs relative to screen
+Observation = namedtuple("Observation", ("terrain", "player", "enemies"))
+
+def action_inputs(action):
+	""" returns set of inputs bound to the actions of a bitmask """
+	inputs = set()
+	for bound_action, bound_inputs in DEFAULT_BINDINGS.items():
+		if action & (1 << bound_action):
+			inputs.update(bound_inputs)
+	return frozenset(inputs)
+
+
+class PlatformerEnv(object):
+	""" one game instance driven by agent actions. Reward is time gained plus gems picked """
+	num_actions = 1 << Action.count
+
+	def __init__(self, max_steps=3600, frame_skip=1, swarms=False):
+		self.max_steps = max_steps
+		self.frame_skip = frame_skip
+		self.swarms = swarms
+		self.session = None
+		self.inputs = [action_inputs(action) for action in range(self.num_actions)]
+
+	def reset(self):
+		""" starts a new game, returns first observation. The session is restarted in place,
+		only created the first time or after close() """
+		if self.session is None:
+			self.session = Session(swarms=self.swarms)
+		else:
+			self.session.restart()
+		self.steps = 0
+		self.time = game.world.time
+		self.gems = 0
+		return self.observe()
+
+	def step(self, action):
+		""" runs frame_skip frames with given action, returns (observation, reward, done) """
+		self.session.state["window"].inputs = self.inputs[action]
+		self.session.run(self.frame_skip)
+		self.steps += 1
+		world = game.world
+		reward = (world.time - self.time) + (world.gems - self.gems)
+		self.time = world.time
+		self.gems = world.gems
+		done = world.time == 0 or self.steps >= self.max_steps
+		return self.observe(), reward, done
+
+	def observe(self):
+		""" returns observation of the active session """
+		world = game.world
+		terrain = world.terrain
+		first_col = world.x // terrain.tile_size
+		num_cols = game.WIDTH // terrain.tile_size
+		grid = memoryview(terrain.region(first_col, num_cols)).cast("B", (terrain.rows, num_cols))
+		player = game.player
+		player_state = array("f", (player.x - world.x, player.y, player.xspeed, player.yspeed))
+		enemies = array("f", bytes(MAX_ENEMIES * 2 * 4))
+		n = 0
+		for enemy in self.enemy_positions():
+			if n == MAX_ENEMIES:
+				break
+			enemies[n*2] = enemy[0] - world.x
+			enemies[n*2 + 1] = enemy[1]
+			n += 1
+		return Observation(grid, player_state, enemies)
+
+	def enemy_positions(self):
+		""" iterates (x, y) of active enemies, actors or swarms """
+		for enemy in game.actors.group("enemies"):
+			yield enemy.x, enemy.y
+		if game.swarms is not None:
+			for swarm in game.swarms.values():
+				for n in range(swarm.count):
+					yield swarm.x[n], swarm.y[n]
+
+	def close(self):
+		if self.session is not None:
+			self.session.close()
+			self.session = None
+
+
+class VectorEnv(object):
+	""" several environments stepped in lockstep. Finished ones are reset automatically,
+	returning the first observation of the new game """
+	def __init__(self, num_envs, max_steps=3600, frame_skip=1, swarms=False):
+		self.envs = [PlatformerEnv(max_steps, frame_skip, swarms) for n in range(num_envs)]
+
+	def reset(self):
+		""" starts all games, returns list of observations """
+		return [env.reset() for env in self.envs]
+
+	def step(self, actions):
+		""" steps each game with its action, returns lists of observations, rewards and done flags """
+		observations = list()
+		rewards = array("f")
+		dones = list()
+		for env, action in zip(self.envs, actions):
+			observation, reward, done = env.step(action)
+			if done:
+				observation = env.reset()
+			observations.append(observation)
+			rewards.append(reward)
+			dones.append(done)
+		return observations, rewards, dones
+
+	def close(self):
+		for env in self.envs:
+			env.close()
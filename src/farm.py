@@ -0,0 +1,79 @@
+"""
+Simulation farm: runs many headless sessions in parallel in a pool of processes, and
+aggregates per-session results and timings (level validation sweeps, bot runs...)
+
+Usage: python farm.py [--sessions N] [--frames N] [--processes N] [--swarm] [--output FILE]
+"""
+
+import json
+import argparse
+from random import Random
+from time import perf_counter
+from multiprocessing import Pool
+from tilengine import Input
+from headless import FixedClock, InputScript, DEMO_SCRIPT
+from session import Session
+
+def random_script(seed, num_frames):
+	""" returns input script with random runs and jumps, repeatable for a given seed """
+	random = Random(seed)
+	events = list()
+	frame = 0
+	while frame < num_frames:
+		direction = random.choice((Input.RIGHT, Input.RIGHT, Input.LEFT))
+		inputs = (direction, Input.A) if random.random() < 0.3 else (direction,)
+		events.append((frame, inputs))
+		frame += random.randint(5, 60)
+	return InputScript(events)
+
+def run_session(task):
+	""" pool task: runs one session, returns its results """
+	seed, num_frames, swarms = task
+	script = DEMO_SCRIPT if seed is None else random_script(seed, num_frames)
+	session = Session(FixedClock(), script, swarms)
+	session.run(num_frames)
+	result = session.result()
+	result["seed"] = seed
+	session.close()
+	return result
+
+def run(num_sessions, num_frames, processes=None, swarms=False):
+	""" runs sessions with seeds 0 to num_sessions-1, returns (results, elapsed seconds) """
+	tasks = [(seed, num_frames, swarms) for seed in range(num_sessions)]
+	t0 = perf_counter()
+	with Pool(processes) as pool:
+		results = pool.map(run_session, tasks, chunksize=1)
+	return results, perf_counter() - t0
+
+def summary(results, elapsed):
+	""" aggregates results of all sessions """
+	frames = sum(result["frames"] for result in results)
+	busy = sum(result["elapsed"] for result in results)
+	return {
+		"sessions": len(results),
+		"frames": frames,
+		"elapsed": elapsed,
+		"fps": frames / elapsed,
+		"session_fps": frames / busy,
+		"slowest": max(result["elapsed"] for result in results),
+		"timeouts": sum(1 for result in results if result["time"] == 0)
+	}
+
+def main():
+	parser = argparse.ArgumentParser(description="Runs headless sessions in parallel")
+	parser.add_argument("--sessions", type=int, default=16, help="number of sessions, one random seed each")
+	parser.add_argument("--frames", type=int, default=3600, help="frames per session")
+	parser.add_argument("--processes", type=int, help="worker processes, one per core by default")
+	parser.add_argument("--swarm", action="store_true", help="updates enemies in struct-of-arrays swarms")
+	parser.add_argument("--output", metavar="FILE", help="writes per-session results as JSON")
+	args = parser.parse_args()
+
+	results, elapsed = run(args.sessions, args.frames, args.processes, args.swarm)
+	report = summary(results, elapsed)
+	print(json.dumps(report, indent=1))
+	if args.output:
+		with open(args.output, "w") as file:
+			json.dump({"summary": report, "sessions": results}, file, indent=1)
+
+if __name__ == "__main__":
+	main()
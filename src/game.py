@@ -11,8 +11,20 @@ ASSETS_PATH = "../assets"
 
 engine = ()	    # tilengine main instance
 window = ()	    # tilengine window instance
-actors = ()	    # list that contains every active game entity
+controls = ()	    # per-frame input snapshot
+actors = ()	    # entity store that contains every active game entity
+effects = ()	    # pool of one-shot animations
+scores = ()	    # pool of pop-up scores
+sprites = ()	    # sprite slots allocator
 ui = ()		    # UI items
 world = ()	    # world/level instance
+levels = ()	    # level sequence, next one preloaded
+activity = ()	    # sleeps and despawns enemies away from screen
+raster = ()     # raster effect instance
 player = ()     # player instance
+enemy_grid = () # broadphase collision grid of enemies
+player_grid = ()# broadphase collision grid of players
 sounds = ()	    # sound effects handler
+assets = ()	    # preloaded resources
+profiler = None # optional profiler instance
+swarms = None   # optional enemy swarms by item type
@@ -0,0 +1,159 @@
+"""
+Headless fixed-timestep runner: drives the game without a window, as fast as the CPU
+allows, rendering each frame into an off-screen buffer. Time and input are injected,
+so runs are repeatable on machines without display (soak tests, fps measurement)
+
+Usage: python headless.py [--frames N] [--rate FPS] [--profile FILE] [--swarm] [--record FILE]
+	[--capture DIR] [--capture-format png|raw] [--capture-lossless] [--capture-stride N]
+"""
+
+import os
+import argparse
+from bisect import bisect_right
+from time import perf_counter
+from tilengine import Input
+from capture import Framebuffer, Capture
+from replay import ReplayLog, RecordingWindow, HASH_FRAMEBUFFER, SWARMS
+import platformer
+import game
+
+# no audio device required
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+
+class FixedClock(object):
+	""" simulated clock that advances a fixed timestep each frame """
+	def __init__(self, frame_rate=60):
+		self.frame_rate = frame_rate
+
+	def __call__(self, num_frame):
+		""" returns milliseconds elapsed at given frame """
+		return num_frame * 1000 // self.frame_rate
+
+
+class InputScript(object):
+	""" scripted input: list of (frame, inputs) events, each state held until the next event """
+	def __init__(self, events):
+		events = sorted(events, key=lambda event: event[0])
+		self.frames = [frame for frame, inputs in events]
+		self.states = [frozenset(inputs) for frame, inputs in events]
+
+	def __call__(self, num_frame):
+		""" returns set of Input values pressed at given frame """
+		index = bisect_right(self.frames, num_frame) - 1
+		if index < 0:
+			return frozenset()
+		return self.states[index]
+
+
+class HeadlessWindow(object):
+	""" off-screen replacement of tilengine Window, with injectable clock, input script and capture """
+	def __init__(self, clock=None, script=None, capture=None):
+		self.num_frame = 0
+		self.width = game.WIDTH
+		self.height = game.HEIGHT
+		self.screen = Framebuffer(game.WIDTH, game.HEIGHT)
+		self.framebuffer = self.screen
+		self.clock = clock if clock is not None else FixedClock()
+		self.script = script
+		self.capture = capture
+		self.inputs = frozenset()
+		self.screen.attach(game.engine)
+
+	def process(self):
+		""" renders current frame into the framebuffer and advances to next frame """
+		target = self.screen
+		if self.capture is not None:
+			target = self.capture.acquire() or self.screen
+		if target is not self.framebuffer:
+			target.attach(game.engine)
+			self.framebuffer = target
+		game.engine.update_frame(self.num_frame)
+		if target is not self.screen:
+			self.capture.submit(self.num_frame)
+		self.num_frame += 1
+		if self.script is not None:
+			self.inputs = self.script(self.num_frame)
+		return True
+
+	def is_active(self):
+		return True
+
+	def get_input(self, input_id):
+		""" returns state of given input as set by the script """
+		return input_id in self.inputs
+
+	def get_ticks(self):
+		""" returns simulated milliseconds """
+		return self.clock(self.num_frame)
+
+	def delay(self, msecs):
+		""" no real time to wait for """
+
+	def stop_capture(self):
+		""" renders into own framebuffer again and waits for captured frames to be written """
+		self.screen.attach(game.engine)
+		self.framebuffer = self.screen
+		self.capture.close()
+		self.capture = None
+
+
+# default soak-test script: runs right, jumping every second
+DEMO_SCRIPT = InputScript([(frame, (Input.RIGHT, Input.A) if frame % 60 == 30 else (Input.RIGHT,))
+	for frame in range(0, 36000, 30)])
+
+def run(num_frames, clock=None, script=None, swarms=False, log=None, capture=None):
+	""" runs the game for a number of frames, returns elapsed seconds. Optionally records into log
+	and captures frames """
+	platformer.init()
+	if swarms:
+		platformer.start_swarms()
+	game.window = HeadlessWindow(clock, script, capture)
+	if log is not None:
+		game.window = RecordingWindow(game.window, log)
+	game.world.start()
+	if game.profiler is None:
+		process = game.window.process
+	else:
+		game.profiler.attach(game.engine)
+		process = game.profiler.process
+	t0 = perf_counter()
+	for n in range(num_frames):
+		process()
+		platformer.update()
+	return perf_counter() - t0
+
+def main():
+	parser = argparse.ArgumentParser(description="Runs the platformer without window")
+	parser.add_argument("--frames", type=int, default=3600, help="number of frames to run")
+	parser.add_argument("--rate", type=int, default=60, help="simulated frames per second")
+	parser.add_argument("--profile", metavar="FILE", help="records frame timings into CSV or JSON file")
+	parser.add_argument("--swarm", action="store_true", help="updates enemies in struct-of-arrays swarms")
+	parser.add_argument("--record", metavar="FILE", help="records session for replay.py, framebuffer included")
+	parser.add_argument("--capture", metavar="DIR", help="writes rendered frames into directory")
+	parser.add_argument("--capture-format", choices=("png", "raw"), default="png", help="captured frames format")
+	parser.add_argument("--capture-lossless", action="store_true", help="waits for encoding instead of dropping frames")
+	parser.add_argument("--capture-stride", type=int, default=1, metavar="N", help="captures one of every N frames")
+	args = parser.parse_args()
+
+	if args.profile:
+		platformer.start_profiler()
+	log = None
+	if args.record:
+		log = ReplayLog(HASH_FRAMEBUFFER | (SWARMS if args.swarm else 0))
+	capture = None
+	if args.capture:
+		capture = Capture(args.capture, game.WIDTH, game.HEIGHT, format=args.capture_format,
+			lossless=args.capture_lossless, stride=args.capture_stride)
+	elapsed = run(args.frames, FixedClock(args.rate), DEMO_SCRIPT, args.swarm, log, capture)
+	print("%d frames in %.3f s: %.1f fps" % (args.frames, elapsed, args.frames / elapsed))
+	if capture is not None:
+		print("%d frames captured, %d dropped" % (capture.captured, capture.dropped))
+		game.window.stop_capture()
+	if log is not None:
+		log.save(args.record)
+	if game.profiler is not None:
+		game.profiler.dump(args.profile)
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,195 @@
+"""
+Level sequencing: the files of the next level are read, decoded and parsed by a worker
+thread while the current one is played, terrain included. Its native resources are then
+created in the main thread one per frame, and when the player reaches the end it's swapped
+in by World.set_level() within a frame
+"""
+
+import threading
+from collections import namedtuple
+from tilengine import Tilemap, Tileset, Tile, Spriteset, Sequence
+from collision import CollisionMap
+from streaming import LevelStream, read_manifest, read_chunks
+from tmx import read_tile_layer, read_object_layer, tile_types
+from world import ItemIndex, create_items
+import game
+
+# foreground and background tmx files, objects layer and its first gid, player start position,
+# and extra spritesets and sequences (name: (spriteset, basename, delay)) used by the level
+LevelInfo = namedtuple("LevelInfo", ("foreground", "background", "objects", "first_gid", "start",
+	"spritesets", "sequences"))
+
+LEVELS = (
+	LevelInfo("layer_foreground.tmx", "layer_background.tmx", "Capa de Objetos 1", 973, (60, 188), (), {}),
+)
+
+class Level(object):
+	""" level resources: parsed data first, then native ones ready to be set in World """
+	def __init__(self, info):
+		self.info = info
+		self.manifest = None
+		self.chunks = None
+		self.layers = dict()
+		self.tilesets = dict()
+		self.foreground = None
+		self.background = None
+		self.stream = None
+		self.terrain = None
+		self.objects = None
+		self.width = 0
+		self.spritesets = dict()
+		self.sequences = dict()
+
+
+def read_layer(pack, path, name):
+	""" returns TileLayer of a tmx file, from the asset pack if it has it """
+	layer = pack.tile_layer(name) if pack is not None else None
+	return layer if layer is not None else read_tile_layer(path + name)
+
+def read_types(pack, path, name):
+	""" returns tile types of a tsx file, from the asset pack if it has them """
+	types = pack.tile_types(name) if pack is not None else None
+	return types if types is not None else tile_types(path + name)
+
+def read_objects(pack, path, info):
+	""" returns items of the objects layer of a level, from the asset pack if it has them """
+	objects = pack.object_layer(info.foreground, info.objects, info.first_gid) if pack is not None else None
+	if objects is None:
+		objects = read_object_layer(path + info.foreground, info.objects, info.first_gid)
+	return create_items(objects)
+
+def parse_level(info):
+	""" reads and decodes the files of a level, computing its terrain and items. Makes no
+	native calls, so it can run in a worker thread. Data in the asset pack is taken from it """
+	level = Level(info)
+	pack = game.assets.pack if game.assets else None
+	path = game.ASSETS_PATH + "/"
+	file_name = path + info.foreground
+	level.layers[info.background] = read_layer(pack, path, info.background)
+	level.manifest = read_manifest(file_name)
+	if level.manifest is not None:
+		level.chunks = read_chunks(file_name, level.manifest, game.WIDTH)
+		level.width = level.manifest["cols"] * 16
+	else:
+		layer = read_layer(pack, path, info.foreground)
+		level.layers[info.foreground] = layer
+		level.terrain = CollisionMap.fromtiles(layer.rows, layer.cols, layer.tiles,
+			read_types(pack, path, layer.tileset))
+		level.width = level.terrain.width
+	level.objects = ItemIndex(read_objects(pack, path, info))
+	return level
+
+def create_tilemap(level, name, assets):
+	""" returns tilemap of a decoded layer, or the preloaded one if given assets have it """
+	if assets is not None and name in assets.tilemaps:
+		return assets.tilemaps[name]
+	layer = level.layers[name]
+	tiles = (Tile * (layer.rows * layer.cols)).from_buffer(layer.tiles)
+	return Tilemap.create(layer.rows, layer.cols, tiles, layer.background_color, level.tilesets[name])
+
+def build_steps(level, assets=None):
+	""" creates native resources of a parsed level in the main thread, yielding after each
+	one so they can be spread over frames. Tilemaps are taken from preloaded assets if given """
+	info = level.info
+	names = [info.background]
+	if level.manifest is None:
+		names.append(info.foreground)
+	for name in names:
+		if assets is None or name not in assets.tilemaps:
+			level.tilesets[name] = Tileset.fromfile(level.layers[name].tileset)
+			yield
+	level.background = create_tilemap(level, info.background, assets)
+	yield
+	if level.manifest is not None:
+		level.stream = LevelStream(game.ASSETS_PATH + "/" + info.foreground, level.manifest, game.WIDTH,
+			chunks=level.chunks)
+		yield
+		level.stream.update(0)
+		level.terrain = level.stream.terrain
+	else:
+		level.foreground = create_tilemap(level, info.foreground, assets)
+	for name in info.spritesets:
+		yield
+		level.spritesets[name] = Spriteset.fromfile(name)
+	for name, (spriteset, basename, delay) in info.sequences.items():
+		yield
+		source = level.spritesets.get(spriteset) or game.assets.spritesets[spriteset]
+		level.sequences[name] = Sequence.create_sprite_sequence(source, basename, delay)
+	level.layers = None
+	level.chunks = None
+
+def load_level(info, assets=None):
+	""" loads resources of a level now. Tilemaps are taken from preloaded assets if given """
+	level = parse_level(info)
+	for step in build_steps(level, assets):
+		pass
+	return level
+
+
+class LevelSequence(object):
+	""" plays levels in order, looping, with the next one preloaded in background """
+	def __init__(self, levels=LEVELS, index=0):
+		self.levels = levels
+		self.start = index
+		self.index = index
+		self.next = None
+		self.error = None
+		self.thread = None
+		self.steps = None
+		self.built = False
+
+	def first(self):
+		""" loads first level now, using preloaded assets """
+		return load_level(self.levels[self.index], game.assets)
+
+	def restart(self):
+		""" goes back to the first level, loaded again so its items and gems are restored """
+		self.thread.join()
+		self.index = self.start
+		level = load_level(self.levels[self.index])
+		game.assets.spritesets.update(level.spritesets)
+		game.assets.sequences.update(level.sequences)
+		game.world.set_level(level)
+		self.preload()
+
+	def preload(self):
+		""" starts parsing next level in a worker thread """
+		index = (self.index + 1) % len(self.levels)
+		self.next = None
+		self.error = None
+		self.steps = None
+		self.built = False
+		self.thread = threading.Thread(target=self.load, args=(index,), daemon=True)
+		self.thread.start()
+
+	def load(self, index):
+		try:
+			self.next = (index, parse_level(self.levels[index]))
+		except Exception as error:
+			self.error = error
+
+	def ready(self):
+		""" returns if next level has been parsed """
+		return self.next is not None
+
+	def update(self):
+		""" creates one native resource of the next level once it's parsed, called once per frame """
+		if self.built or self.next is None:
+			return
+		if self.steps is None:
+			self.steps = build_steps(self.next[1])
+		self.built = next(self.steps, True) is True
+
+	def advance(self):
+		""" sets next level in world. Waits for the worker and builds what's left only if the
+		end is reached before it's ready. Errors of the worker are raised here """
+		self.thread.join()
+		if self.error is not None:
+			raise self.error
+		while not self.built:
+			self.update()
+		self.index, level = self.next
+		game.assets.spritesets.update(level.spritesets)
+		game.assets.sequences.update(level.sequences)
+		game.world.set_level(level)
+		self.preload()
@@ -1,43 +1,56 @@
 """ Terrestrial enemy, chases player on floor """
 
-from tilengine import Spriteset, Sequence, Flags
+from tilengine import Flags
 from actor import Actor, Direction
+from rectangle import Rectangle
 import game
 
 class Opossum(Actor):
 	""" Floor enemy. Chases player in a 80 pixel radius """
 	size = (36, 24)
-	seq_walk = None
+	groups = ("enemies",)
 
 	def __init__(self, item_ref, x, y):
-
-		# init class members once
-		if Opossum.spriteset is None:
-			Opossum.spriteset = Spriteset.fromfile("enemy_opossum")
-			Opossum.seq_walk = Sequence.create_sprite_sequence(Opossum.spriteset, "opossum-", 6)
-
+		self.spriteset = game.assets.spritesets["enemy_opossum"]
 		Actor.__init__(self, item_ref, x, y)
 		self.xspeed = -2
 		self.direction = Direction.Left
-		self.sprite.set_animation(Opossum.seq_walk, 0)
+		self.sprite.set_animation(game.assets.sequences["walk"], 0)
+		self.rectangle = Rectangle(x, y, self.size[0], self.size[1])
+		game.enemy_grid.update(self, self.rectangle)
+
+	def wake(self):
+		""" resumes drawing after sleep() """
+		Actor.wake(self)
+		self.sprite.set_animation(game.assets.sequences["walk"], 0)
+		if self.direction is Direction.Right:
+			self.sprite.set_flags(Flags.FLIPX)
+
+	def check_hit(self, x):
+		""" hurts players touching the given point of the front side """
+		y = self.y + self.size[1]//2
+		for player in game.player_grid.query(x, y, x, y):
+			player.check_hit(x, y, self.direction)
 
 	def update(self):
 		""" Update once per frame """
 		self.x += self.xspeed
+		self.rectangle.update_position(self.x, self.y)
+		game.enemy_grid.update(self, self.rectangle)
 		if self.direction is Direction.Left:
 			if self.x - game.player.x < -80:
 				self.direction = Direction.Right
 				self.xspeed = -self.xspeed
 				self.sprite.set_flags(Flags.FLIPX)
 			else:
-				game.player.check_hit(self.x, self.y + self.size[1]//2, self.direction)
+				self.check_hit(self.x)
 		else:
 			if self.x - game.player.x > 80 and self.direction is Direction.Right:
 				self.direction = Direction.Left
 				self.xspeed = -self.xspeed
 				self.sprite.set_flags(0)
 			else:
-				game.player.check_hit(self.x + self.size[0], self.y + self.size[1]//2, self.direction)
+				self.check_hit(self.x + self.size[0])
 
 		self.sprite.set_position(self.x - game.world.x, self.y)
 		return True
@@ -0,0 +1,167 @@
+"""
+Asset pack for the data read by python code: sound effects, decoded tmx tile layers, tmx
+object layers and tile type tables, precompiled into a single file that is memory-mapped at
+startup. Entries are looked up by name and read without parsing nor copies.
+Graphic resources loaded by tilengine (spritesets, tilesets, palettes) aren't included, they
+are read from the loose files or from a tilengine resource pack (see assets.py)
+
+Build the pack with: python pack.py [--output FILE]
+"""
+
+import os
+import mmap
+import struct
+import argparse
+from array import array
+from tmx import TileLayer, read_tile_layer, parse_object_layer, tile_types
+
+PACK_NAME = "assets.pak"
+MAGIC = b"TPAK"
+VERSION = 1
+
+# magic, version, number of entries
+HEADER = struct.Struct("<4sHI")
+# offset, size, name length, followed by the name
+ENTRY = struct.Struct("<QQH")
+# rows, cols, background color, tileset name length, followed by the name and the tiles
+TILE_LAYER = struct.Struct("<IIIH")
+
+def sound_name(file_name):
+	return "sound/" + file_name
+
+def tiles_name(file_name):
+	return "tiles/" + file_name
+
+def objects_name(file_name, layer_name, first_gid):
+	return "objects/%s/%s/%d" % (file_name, layer_name, first_gid)
+
+def types_name(file_name):
+	return "types/" + file_name
+
+def pack_tile_layer(layer):
+	""" returns bytes of a TileLayer """
+	tileset = layer.tileset.encode()
+	return (TILE_LAYER.pack(layer.rows, layer.cols, layer.background_color, len(tileset)) +
+		tileset + layer.tiles.tobytes())
+
+def unpack_tile_layer(data):
+	""" returns TileLayer from bytes made by pack_tile_layer() """
+	rows, cols, background_color, name_length = TILE_LAYER.unpack_from(data)
+	start = TILE_LAYER.size + name_length
+	tileset = bytes(data[TILE_LAYER.size:start]).decode()
+	tiles = array("H")
+	tiles.frombytes(data[start:])
+	return TileLayer(rows, cols, tiles, tileset, background_color)
+
+def write(file_name, entries):
+	""" writes pack file with a dictionary of name: bytes """
+	index = list()
+	offset = HEADER.size + sum(ENTRY.size + len(name.encode()) for name in entries)
+	for name, data in entries.items():
+		index.append(ENTRY.pack(offset, len(data), len(name.encode())) + name.encode())
+		offset += len(data)
+	with open(file_name, "wb") as file:
+		file.write(HEADER.pack(MAGIC, VERSION, len(entries)))
+		for entry in index:
+			file.write(entry)
+		for data in entries.values():
+			file.write(data)
+
+def build(path, file_name, sounds=(), tilemaps=(), object_layers=()):
+	""" packs the given sound and tmx files of the assets path. object_layers is a sequence of
+	(tmx file, layer name, first gid) of level foregrounds, the tile types of their tilesets
+	are included for the terrain """
+	entries = dict()
+	layers = dict()
+	for name in sounds:
+		with open(os.path.join(path, name), "rb") as file:
+			entries[sound_name(name)] = file.read()
+	for name in tilemaps:
+		layers[name] = read_tile_layer(os.path.join(path, name))
+		entries[tiles_name(name)] = pack_tile_layer(layers[name])
+	for name, layer_name, first_gid in object_layers:
+		objects = parse_object_layer(os.path.join(path, name), layer_name, first_gid)
+		if objects is not None:
+			entries[objects_name(name, layer_name, first_gid)] = objects.tobytes()
+		tileset = (layers.get(name) or read_tile_layer(os.path.join(path, name))).tileset
+		entries[types_name(tileset)] = bytes(tile_types(os.path.join(path, tileset)))
+	write(file_name, entries)
+
+
+class Pack(object):
+	""" memory-mapped pack file. Entries are memoryviews of the mapping """
+	def __init__(self, file_name):
+		with open(file_name, "rb") as file:
+			self.memory = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_COPY)
+		self.view = memoryview(self.memory)
+		magic, version, count = HEADER.unpack_from(self.view)
+		if magic != MAGIC or version != VERSION:
+			raise ValueError("%s is not a version %d asset pack" % (file_name, VERSION))
+		self.entries = dict()
+		position = HEADER.size
+		for n in range(count):
+			offset, size, name_length = ENTRY.unpack_from(self.view, position)
+			position += ENTRY.size
+			name = bytes(self.view[position:position + name_length]).decode()
+			position += name_length
+			self.entries[name] = (offset, size)
+
+	@classmethod
+	def open(cls, path):
+		""" returns pack of an assets path, or None if it hasn't been built """
+		file_name = os.path.join(path, PACK_NAME)
+		if not os.path.isfile(file_name):
+			return None
+		return cls(file_name)
+
+	def get(self, name):
+		""" returns memoryview of an entry, or None if not packed """
+		entry = self.entries.get(name)
+		if entry is None:
+			return None
+		offset, size = entry
+		return self.view[offset:offset + size]
+
+	def sound(self, file_name):
+		""" returns contents of a sound file, or None """
+		return self.get(sound_name(file_name))
+
+	def tile_layer(self, file_name):
+		""" returns TileLayer of a tmx file, or None """
+		data = self.get(tiles_name(file_name))
+		return unpack_tile_layer(data) if data is not None else None
+
+	def object_layer(self, file_name, layer_name, first_gid):
+		""" returns packed array of (type, x, y) of an object layer like tmx.read_object_layer(), or None """
+		data = self.get(objects_name(file_name, layer_name, first_gid))
+		if data is None:
+			return None
+		objects = array("i")
+		objects.frombytes(data)
+		return objects
+
+	def tile_types(self, file_name):
+		""" returns table of tile types of a tsx file, or None """
+		data = self.get(types_name(file_name))
+		return bytearray(data) if data is not None else None
+
+
+def main():
+	from assets import SOUNDS, TILEMAPS
+	from levels import LEVELS
+	import game
+	parser = argparse.ArgumentParser(description="Builds the asset pack of the python side data")
+	parser.add_argument("--path", default=game.ASSETS_PATH, help="assets path")
+	parser.add_argument("--output", metavar="FILE", help="pack file, %s in assets path by default" % PACK_NAME)
+	args = parser.parse_args()
+
+	tilemaps = set(TILEMAPS)
+	object_layers = list()
+	for info in LEVELS:
+		tilemaps.update((info.foreground, info.background))
+		object_layers.append((info.foreground, info.objects, info.first_gid))
+	output = args.output or os.path.join(args.path, PACK_NAME)
+	build(args.path, output, SOUNDS.values(), sorted(tilemaps), object_layers)
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,81 @@
+"""
+Palette effects (fades, flashes, tints, blends between palettes). Derived palettes are
+computed once from the original colors, cached by effect parameters, and uploaded into
+the target palette with a single memory copy instead of one call per color
+"""
+
+from ctypes import memmove
+
+def upload(destination, colors):
+	""" copies colors into native palette memory. Replaced by pipeline.py to defer it in pipelined mode """
+	memmove(destination, colors, len(colors))
+
+def channel_table(function):
+	""" returns 256-byte translation table of a channel function """
+	return bytes(min(255, max(0, int(function(value)))) for value in range(256))
+
+def map_channels(data, tables):
+	""" applies per-channel translation tables to BGRA data, alpha is kept """
+	result = bytearray(data)
+	for channel, table in enumerate(tables):
+		result[channel::4] = data[channel::4].translate(table)
+	return bytes(result)
+
+
+class PaletteFX(object):
+	""" Effects applied in place over a palette, keeping a copy of its original colors """
+	def __init__(self, palette, num_entries=256):
+		self.palette = palette
+		self.data = palette.get_data(num_entries)
+		self.source = bytes(self.data)
+		self.cache = dict()
+		self.current = self.source
+
+	def fade(self, color, amount):
+		""" returns colors moved towards color by amount (0-255) """
+		key = ("fade", color.r, color.g, color.b, amount)
+		derived = self.cache.get(key)
+		if derived is None:
+			tables = [channel_table(lambda value, target=target: value + (target - value)*amount//255)
+				for target in (color.b, color.g, color.r)]
+			derived = self.cache[key] = map_channels(self.source, tables)
+		return derived
+
+	def tint(self, color):
+		""" returns colors multiplied by color """
+		key = ("tint", color.r, color.g, color.b)
+		derived = self.cache.get(key)
+		if derived is None:
+			tables = [channel_table(lambda value, factor=factor: value*factor//255)
+				for factor in (color.b, color.g, color.r)]
+			derived = self.cache[key] = map_channels(self.source, tables)
+		return derived
+
+	def blend(self, palette, amount):
+		""" returns colors moved towards the ones of another palette by amount (0-255) """
+		key = ("blend", id(palette), amount)
+		derived = self.cache.get(key)
+		if derived is None:
+			other = bytes(palette.get_data(len(self.source) // 4))
+			derived = bytearray(a + (b - a)*amount//255 for a, b in zip(self.source, other))
+			derived[3::4] = self.source[3::4]
+			derived = self.cache[key] = bytes(derived)
+		return derived
+
+	def fade_ramp(self, color, steps):
+		""" returns list of fades from original colors (first) to color (last) """
+		return [self.fade(color, step*255//(steps - 1)) for step in range(steps)]
+
+	def blend_ramp(self, palette, steps):
+		""" returns list of blends from original colors (first) to another palette (last) """
+		return [self.blend(palette, step*255//(steps - 1)) for step in range(steps)]
+
+	def apply(self, derived):
+		""" uploads derived colors into the palette """
+		if derived is not self.current:
+			upload(self.data, derived)
+			self.current = derived
+
+	def restore(self):
+		""" uploads original colors back """
+		self.apply(self.source)
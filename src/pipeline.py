@@ -0,0 +1,168 @@
+"""
+Pipelined mode: simulation of frame N+1 runs in the main thread while a render thread draws
+frame N. The render thread owns the window and draws one frame each time it's asked to, so
+between frames it's provably idle: state setters called from the main thread are queued and
+applied then, and the renderer and raster callback never see half-updated sprites or layers
+"""
+
+import sys
+import threading
+import tilengine
+import palette_fx
+from tilengine import Window
+
+# native functions that change drawing state or free what is drawn, deferred when called from the main thread
+DEFERRED = (
+	"TLN_ConfigSprite",
+	"TLN_SetSpriteSet",
+	"TLN_SetSpritePosition",
+	"TLN_SetSpriteWorldPosition",
+	"TLN_SetSpriteFlags",
+	"TLN_EnableSpriteFlag",
+	"TLN_SetSpritePicture",
+	"TLN_SetSpritePalette",
+	"TLN_SetSpritePivot",
+	"TLN_SetSpriteScaling",
+	"TLN_ResetSpriteScaling",
+	"TLN_SetSpriteBlendMode",
+	"TLN_SetSpriteAnimation",
+	"TLN_DisableSpriteAnimation",
+	"TLN_DisableSprite",
+	"TLN_EnableSpriteMasking",
+	"TLN_SetSpritesMaskRegion",
+	"TLN_SetFirstSprite",
+	"TLN_SetNextSprite",
+	"TLN_SetWorldPosition",
+	"TLN_SetLayer",
+	"TLN_SetLayerTilemap",
+	"TLN_SetLayerBitmap",
+	"TLN_SetLayerPalette",
+	"TLN_SetLayerPosition",
+	"TLN_SetLayerScaling",
+	"TLN_SetLayerTransform",
+	"TLN_SetLayerPixelMapping",
+	"TLN_ResetLayerMode",
+	"TLN_SetLayerBlendMode",
+	"TLN_SetLayerColumnOffset",
+	"TLN_SetLayerClip",
+	"TLN_DisableLayerClip",
+	"TLN_SetLayerMosaic",
+	"TLN_DisableLayerMosaic",
+	"TLN_SetLayerPriority",
+	"TLN_SetLayerParallaxFactor",
+	"TLN_EnableLayer",
+	"TLN_DisableLayer",
+	"TLN_SetTilemapTile",
+	"TLN_CopyTiles",
+	"TLN_SetBGColor",
+	"TLN_SetBGColorFromTilemap",
+	"TLN_DisableBGColor",
+	"TLN_SetBGBitmap",
+	"TLN_SetBGPalette",
+	"TLN_SetPaletteColor",
+	"TLN_MixPalettes",
+	"TLN_AddPaletteColor",
+	"TLN_SubPaletteColor",
+	"TLN_ModPaletteColor",
+	"TLN_DeleteTilemap",
+	"TLN_DeleteTileset",
+	"TLN_DeleteSpriteset",
+	"TLN_DeleteSequence",
+	"TLN_DeleteSequencePack",
+	"TLN_DeletePalette",
+	"TLN_DeleteBitmap"
+)
+
+SWITCH_INTERVAL = 0.0005	# seconds, lets render thread take the GIL for raster callbacks
+
+class DeferredLibrary(object):
+	""" proxy of the native library that queues state setters called from the main thread.
+	Calls from other threads (the renderer running the raster callback) pass through """
+	def __init__(self, library):
+		self.library = library
+		self.queue = list()
+		self.thread = threading.get_ident()
+		for name in DEFERRED:
+			setattr(self, name, self.defer(getattr(library, name)))
+
+	def __getattr__(self, name):
+		return getattr(self.library, name)
+
+	def defer(self, function):
+		""" returns wrapper of function that queues calls from the main thread """
+		queue = self.queue
+		thread = self.thread
+		get_ident = threading.get_ident
+
+		def deferred(*args):
+			if get_ident() == thread:
+				queue.append((function, args))
+				return True
+			return function(*args)
+		return deferred
+
+	def flush(self):
+		""" applies queued calls in order, must be called when the renderer is idle """
+		queue = self.queue
+		for function, args in queue:
+			function(*args)
+		del queue[:]
+
+
+class Pipeline(object):
+	""" runs game loop overlapping simulation with rendering in a render thread """
+	def __init__(self):
+		self.library = None
+		self.window = None
+		self.error = None
+		self.active = True
+		self.draw = threading.Event()
+		self.drawn = threading.Event()
+		self.thread = None
+
+	def install(self):
+		""" replaces native library with deferring proxy, must be called before init().
+		Palette uploads write native memory directly, so they're deferred too """
+		self.library = DeferredLibrary(tilengine._tln)
+		tilengine._tln = self.library
+		palette_fx.upload = self.library.defer(palette_fx.upload)
+
+	def start(self):
+		""" applies state queued by init(), starts render thread and returns its window once created """
+		self.library.flush()
+		self.thread = threading.Thread(target=self.render, daemon=True)
+		self.thread.start()
+		self.drawn.wait()
+		if self.error is not None:
+			raise self.error
+		return self.window
+
+	def render(self):
+		""" render thread: creates window, then draws one frame each time it's requested """
+		try:
+			self.window = Window.create()
+		except Exception as error:
+			self.error = error
+			self.drawn.set()
+			return
+		self.drawn.set()
+		while self.active:
+			self.draw.wait()
+			self.draw.clear()
+			self.active = self.window.process()
+			self.drawn.set()
+
+	def run(self, simulate, commit):
+		""" runs simulate() while a frame is drawn, then commit() with queued state once it's done """
+		interval = sys.getswitchinterval()
+		sys.setswitchinterval(SWITCH_INTERVAL)
+		try:
+			while self.active:
+				self.drawn.clear()
+				self.draw.set()
+				simulate()
+				self.drawn.wait()
+				self.library.flush()
+				commit()
+		finally:
+			sys.setswitchinterval(interval)
@@ -1,38 +1,131 @@
 """ Tilengine python platformer demo """
 
+import argparse
 from tilengine import Engine, Window
-from raster_effect import raster_effect
-from world import World
+from raster_effect import RasterEffect
+from world import World, Item
 from player import Player
 from UI import UI
 from sound import Sound
+from assets import Assets
+from actor import SpriteAllocator
+from entities import EntityStore
+from controls import Controls
+from pool import ActorPool
+from effect import Effect
+from score import Score
+from profiler import Profiler
+from pipeline import Pipeline
+from replay import ReplayLog, RecordingWindow, SWARMS
+from collision import CollisionGrid
+from levels import LevelSequence
+from activity import ActivityManager
+from swarm import EagleSwarm, OpossumSwarm
 import game
 
-# init tilengine
-game.engine = Engine.create(game.WIDTH, game.HEIGHT, game.MAX_LAYERS, game.MAX_SPRITES, 0)
-game.engine.set_load_path(game.ASSETS_PATH)
-
-# set raster callback
-game.engine.set_raster_callback(raster_effect)
-
-# init global game entities
-game.actors = list()
-game.world = World()
-game.player = Player()
-game.ui = UI()
-
-# load sound effects
-game.sounds = Sound(4, game.ASSETS_PATH)
-game.sounds.load("jump", "jump.wav")
-game.sounds.load("crush", "crunch.wav")
-game.sounds.load("pickup", "pickup.wav")
-game.sounds.load("hurt", "hurt.wav")
-game.sounds.load("eagle", "vulture.wav")
-
-# create window & start main loop
-game.window = Window.create()		
-game.world.start()
-while game.window.process():
-    for actor in game.actors:
-        if not actor.update():
-            game.actors.remove(actor)
+def init():
+	""" creates engine, loads resources and creates global game entities """
+
+	# init tilengine
+	game.engine = Engine.create(game.WIDTH, game.HEIGHT, game.MAX_LAYERS, game.MAX_SPRITES, 0)
+	game.engine.set_load_path(game.ASSETS_PATH)
+	game.sprites = SpriteAllocator(game.engine.sprites)
+
+	# preload all resources and sound effects
+	game.sounds = Sound(4, game.ASSETS_PATH)
+	game.assets = Assets()
+	game.assets.load(game.ASSETS_PATH, game.sounds)
+
+	# init global game entities
+	game.controls = Controls()
+	game.actors = EntityStore()
+	game.effects = ActorPool(Effect, SpriteAllocator.budgets[Effect.category])
+	game.scores = ActorPool(Score, SpriteAllocator.budgets[Score.category])
+	game.enemy_grid = CollisionGrid()
+	game.player_grid = CollisionGrid()
+	game.levels = LevelSequence()
+	game.world = World(game.levels.first())
+	game.levels.preload()
+	game.activity = ActivityManager()
+	game.raster = RasterEffect()
+	game.raster.update()
+	game.raster.table.commit()
+	game.engine.set_raster_table(game.raster.table)
+	game.player = Player()
+	game.ui = UI()
+
+def update():
+	""" simulates and commits one frame, single-threaded loop """
+	simulate()
+	commit()
+
+def simulate():
+	""" updates all active game entities once per frame """
+	game.controls.sample()
+	profiler = game.profiler
+	for actor in game.actors:
+		if profiler is None:
+			alive = actor.update()
+		else:
+			alive = profiler.update_actor(actor)
+		if not alive:
+			game.actors.remove(actor)
+			actor.release()
+	game.actors.flush()
+
+def commit():
+	""" publishes frame state read by the renderer during drawing """
+	game.raster.table.commit()
+
+def start_swarms():
+	""" replaces one actor per enemy with struct-of-arrays swarms, must be called after init() """
+	game.swarms = {Item.Eagle: EagleSwarm(), Item.Opossum: OpossumSwarm()}
+
+def start_profiler():
+	""" enables profiling, must be called before init() """
+	game.profiler = Profiler()
+	game.profiler.install()
+
+def main():
+	""" creates window & runs main loop """
+	parser = argparse.ArgumentParser(description="Tilengine python platformer")
+	parser.add_argument("--profile", metavar="FILE", help="records frame timings into CSV or JSON file")
+	parser.add_argument("--swarm", action="store_true", help="updates enemies in struct-of-arrays swarms")
+	parser.add_argument("--threaded", action="store_true", help="overlaps simulation with rendering")
+	parser.add_argument("--record", metavar="FILE", help="records session for replay.py")
+	args = parser.parse_args()
+	if args.threaded and (args.profile or args.record):
+		parser.error("--profile and --record require single-threaded window")
+
+	if args.threaded:
+		pipeline = Pipeline()
+		pipeline.install()
+	if args.profile:
+		start_profiler()
+	init()
+	if args.swarm:
+		start_swarms()
+	if args.threaded:
+		game.window = pipeline.start()
+		game.world.start()
+		pipeline.run(simulate, commit)
+		return
+	game.window = Window.create()
+	if args.record:
+		log = ReplayLog(SWARMS if args.swarm else 0)
+		game.window = RecordingWindow(game.window, log)
+	game.world.start()
+	if game.profiler is None:
+		process = game.window.process
+	else:
+		game.profiler.attach(game.engine)
+		process = game.profiler.process
+	while process():
+		update()
+	if game.profiler is not None:
+		game.profiler.dump(args.profile)
+	if args.record:
+		log.save(args.record)
+
+if __name__ == "__main__":
+	main()
@@ -1,16 +1,17 @@
 """ Main player game entity """
 
-from tilengine import Spriteset, Sequence, Palette, Input, Flags, TileInfo
-from actor import Actor, Direction
-from world import Medium, Tiles
-from eagle import Eagle
-from opossum import Opossum
+from tilengine import Flags
+from controls import Action
+from palette_fx import PaletteFX
+from actor import Actor, Direction, SpriteCategory
+from world import Medium, Tiles, TileHit, SLOPE_HEIGHTS
 from rectangle import Rectangle
-from effect import Effect
-from score import Score
 import game
 
-tiles_info = (TileInfo(), TileInfo(), TileInfo(), TileInfo())
+tiles_info = (TileHit(), TileHit(), TileHit(), TileHit())
+
+# step of hit flash ramp by immunity frame, 0 = original palette
+FLASH_WAVE = (0, 1, 2, 3, 4, 3, 2, 1)
 
 class State:
 	""" player states """
@@ -19,6 +20,7 @@ class State:
 
 class Player(Actor):
 	""" main player entity """
+	category = SpriteCategory.Player
 	size = (24, 36)
 	xspeed_delta = 12
 	xspeed_limit = 200
@@ -26,22 +28,14 @@ class Player(Actor):
 	yspeed_limit = 350
 	jspeed_delta = 5
 
-	seq_idle = None
-	seq_jump = None
-	seq_run = None
-	spriteset_death = None
-	seq_death = None
-
 	def __init__(self):
-		
-		# init class members once
-		if Player.spriteset is None:
-			Player.spriteset = Spriteset.fromfile("hero")
-			Player.seq_idle = Sequence.create_sprite_sequence(Player.spriteset, "idle", 4)
-			Player.seq_jump = Sequence.create_sprite_sequence(Player.spriteset, "jump", 24)
-			Player.seq_run = Sequence.create_sprite_sequence(Player.spriteset, "run", 5)
-			Player.spriteset_death = Spriteset.fromfile("effect_death")
-			Player.seq_death = Sequence.create_sprite_sequence(Player.spriteset_death, "death-", 5)
+		assets = game.assets
+		self.spriteset = assets.spritesets["hero"]
+		self.seq_idle = assets.sequences["idle"]
+		self.seq_jump = assets.sequences["jump"]
+		self.seq_run = assets.sequences["run"]
+		self.spriteset_death = assets.spritesets["effect_death"]
+		self.seq_death = assets.sequences["death"]
 
 		Actor.__init__(self, None, 60, 188)
 		self.state = State.Undefined
@@ -53,31 +47,55 @@ class Player(Actor):
 		self.width = self.size[0]
 		self.height = self.size[1]
 		self.medium = Medium.Floor
-		self.jump = False
 		self.immunity = 0
-		self.rectangle = Rectangle(0, 0, self.width, self.height)
-
+		self.rectangle = Rectangle(self.x, self.y, self.width, self.height)
+		game.player_grid.update(self, self.rectangle)
+
+		# hit flash: pulses towards alternate palette while immune
+		self.palette = self.spriteset.palette.clone()
+		self.sprite.set_palette(self.palette)
+		self.flash = PaletteFX(self.palette)
+		self.flash_ramp = self.flash.blend_ramp(assets.palettes["hero_alt.act"], 5)
+
+	def place(self, x, y):
+		""" moves player to a start position, standing """
+		self.x = x
+		self.y = y
+		self.xspeed = 0
+		self.yspeed = 0
+		self.medium = Medium.Floor
+		self.sprite.set_position(self.x, self.y)
+		self.rectangle.update_position(self.x, self.y)
+		game.player_grid.update(self, self.rectangle)
 
-		self.palettes = (self.spriteset.palette, Palette.fromfile("hero_alt.act"))
+	def reset(self, x, y):
+		""" restores initial state at a start position, i.e. when restarting the game """
+		self.immunity = 0
+		self.flash.apply(self.flash_ramp[0])
+		self.direction = Direction.Right
+		self.sprite.set_flags(0)
+		self.state = State.Undefined
+		self.set_idle()
+		self.place(x, y)
 
 	def set_idle(self):
 		""" sets idle state, idempotent """
 		if self.state is not State.Idle:
-			self.sprite.set_animation(Player.seq_idle, 0)
+			self.sprite.set_animation(self.seq_idle, 0)
 			self.state = State.Idle
 			self.xspeed = 0
 
 	def set_running(self):
 		""" sets running state, idempotent """
 		if self.state is not State.Run:
-			self.sprite.set_animation(Player.seq_run, 0)
+			self.sprite.set_animation(self.seq_run, 0)
 			self.state = State.Run
 
 	def set_jump(self):
 		""" sets jump state, idempotent """
 		if self.state is not State.Jump:
 			self.yspeed = -280
-			self.sprite.set_animation(Player.seq_jump, 0)
+			self.sprite.set_animation(self.seq_jump, 0)
 			self.state = State.Jump
 			self.medium = Medium.Air
 			game.sounds.play("jump", 0)
@@ -105,13 +123,14 @@ class Player(Actor):
 		self.immunity = 90
 		game.sounds.play("hurt", 0)
 		game.world.add_timer(-5)
-		Score(-5, self.x, self.y)
+		game.scores.spawn(-5, self.x, self.y)
 
 	def update_direction(self):
 		""" updates sprite facing depending on direction """
-		if game.window.get_input(Input.RIGHT):
+		controls = game.controls
+		if controls.held(Action.Right):
 			direction = Direction.Right
-		elif game.window.get_input(Input.LEFT):
+		elif controls.held(Action.Left):
 			direction = Direction.Left
 		else:
 			direction = self.direction
@@ -124,10 +143,11 @@ class Player(Actor):
 
 	def update_floor(self):
 		""" process input when player is in floor medium """
-		if game.window.get_input(Input.RIGHT) and self.xspeed < Player.xspeed_limit:
+		controls = game.controls
+		if controls.held(Action.Right) and self.xspeed < Player.xspeed_limit:
 			self.xspeed += self.xspeed_delta
 			self.set_running()
-		elif game.window.get_input(Input.LEFT) and self.xspeed > -Player.xspeed_limit:
+		elif controls.held(Action.Left) and self.xspeed > -Player.xspeed_limit:
 			self.xspeed -= Player.xspeed_delta
 			self.set_running()
 		elif abs(self.xspeed) < Player.xspeed_delta:
@@ -138,25 +158,22 @@ class Player(Actor):
 			self.xspeed += Player.xspeed_delta
 		if self.xspeed == 0:
 			self.set_idle()
-		if game.window.get_input(Input.A):
-			if self.jump is not True:
-				self.set_jump()
-				self.jump = True
-		else:
-			self.jump = False
+		if controls.pressed(Action.Jump):
+			self.set_jump()
 
 	def update_air(self):
 		""" process input when player is in air medium """
-		if game.window.get_input(Input.RIGHT) and self.xspeed < Player.xspeed_limit:
+		controls = game.controls
+		if controls.held(Action.Right) and self.xspeed < Player.xspeed_limit:
 			self.xspeed += self.jspeed_delta
-		elif game.window.get_input(Input.LEFT) and self.xspeed > -Player.xspeed_limit:
+		elif controls.held(Action.Left) and self.xspeed > -Player.xspeed_limit:
 			self.xspeed -= self.jspeed_delta
 
 	def check_left(self, x, y):
 		""" checks/adjusts environment collision when player is moving to the left """
-		game.world.foreground.get_tile(x, y + 4, tiles_info[0])
-		game.world.foreground.get_tile(x, y + 18, tiles_info[1])
-		game.world.foreground.get_tile(x, y + 34, tiles_info[2])
+		game.world.terrain.get_tile(x, y + 4, tiles_info[0])
+		game.world.terrain.get_tile(x, y + 18, tiles_info[1])
+		game.world.terrain.get_tile(x, y + 34, tiles_info[2])
 		if Tiles.Wall in (tiles_info[0].type, tiles_info[1].type, tiles_info[2].type):
 			self.x = (tiles_info[0].col + 1) * 16
 			self.xspeed = 0
@@ -164,9 +181,9 @@ class Player(Actor):
 
 	def check_right(self, x, y):
 		""" checks/adjusts environment collision when player is moving to the right """
-		game.world.foreground.get_tile(x + self.width, y + 4, tiles_info[0])
-		game.world.foreground.get_tile(x + self.width, y + 18, tiles_info[1])
-		game.world.foreground.get_tile(x + self.width, y + 34, tiles_info[2])
+		game.world.terrain.get_tile(x + self.width, y + 4, tiles_info[0])
+		game.world.terrain.get_tile(x + self.width, y + 18, tiles_info[1])
+		game.world.terrain.get_tile(x + self.width, y + 34, tiles_info[2])
 		if Tiles.Wall in (tiles_info[0].type, tiles_info[1].type, tiles_info[2].type):
 			self.x = (tiles_info[0].col * 16) - self.width
 			self.xspeed = 0
@@ -174,9 +191,9 @@ class Player(Actor):
 
 	def check_top(self, x, y):
 		""" checks/adjusts environment collision when player is jumping """
-		game.world.foreground.get_tile(x + 0, y, tiles_info[0])
-		game.world.foreground.get_tile(x + 12, y, tiles_info[1])
-		game.world.foreground.get_tile(x + 24, y, tiles_info[2])
+		game.world.terrain.get_tile(x + 0, y, tiles_info[0])
+		game.world.terrain.get_tile(x + 12, y, tiles_info[1])
+		game.world.terrain.get_tile(x + 24, y, tiles_info[2])
 		if Tiles.Wall in (tiles_info[0].type, tiles_info[1].type, tiles_info[2].type):
 			self.y = (tiles_info[0].row + 1) * 16
 			self.yspeed = 0
@@ -186,21 +203,21 @@ class Player(Actor):
 		""" checks/adjusts environment collision when player is falling or running """
 		ground = False
 
-		game.world.foreground.get_tile(x + 0, y + self.height, tiles_info[0])
-		game.world.foreground.get_tile(x + 12, y + self.height, tiles_info[1])
-		game.world.foreground.get_tile(x + 24, y + self.height, tiles_info[2])
-		game.world.foreground.get_tile(x + 12, y + self.height - 1, tiles_info[3])
+		game.world.terrain.get_tile(x + 0, y + self.height, tiles_info[0])
+		game.world.terrain.get_tile(x + 12, y + self.height, tiles_info[1])
+		game.world.terrain.get_tile(x + 24, y + self.height, tiles_info[2])
+		game.world.terrain.get_tile(x + 12, y + self.height - 1, tiles_info[3])
 
 		# check up slope
 		if tiles_info[3].type is Tiles.SlopeUp:
-			slope_height = 16 - tiles_info[3].xoffset
+			slope_height = SLOPE_HEIGHTS[Tiles.SlopeUp][tiles_info[3].xoffset]
 			if self.yspeed >= 0 and tiles_info[3].yoffset > slope_height:
 				self.y -= (tiles_info[3].yoffset - slope_height)
 				ground = True
 
 		# check down slope
 		elif tiles_info[3].type is Tiles.SlopeDown:
-			slope_height = tiles_info[3].xoffset + 1
+			slope_height = SLOPE_HEIGHTS[Tiles.SlopeDown][tiles_info[3].xoffset]
 			if self.yspeed >= 0 and tiles_info[3].yoffset > slope_height:
 				self.y -= (tiles_info[3].yoffset - slope_height)
 				ground = True
@@ -241,18 +258,23 @@ class Player(Actor):
 	def check_jump_on_enemies(self, x, y):
 		""" checks jumping above an enemy. If so, kills it, bounces and spawns a death animation """
 		px, py = x+self.width/2, y+self.height
-		for actor in game.actors:
-			actor_type = type(actor)
-			if actor_type in (Eagle, Opossum):
-				ex, ey = actor.x + actor.size[0]/2, actor.y
-				if abs(px - ex) < 25 and 5 < py - ey < 20:
-					game.world.add_timer(5)
-					actor.kill()
-					self.set_bounce()
-					Effect(actor.x, actor.y - 10, self.spriteset_death, self.seq_death)
-					game.sounds.play("crush", 2)
+		for actor in game.enemy_grid.query(px - 25, py - 20, px + 25, py - 5):
+			if self.check_stomp(px, py, actor.x + actor.size[0]/2, actor.y):
+				actor.kill()
+				self.stomp(actor.x, actor.y)
 		return
 
+	def check_stomp(self, px, py, ex, ey):
+		""" returns if feet at px,py land on an enemy whose top center is at ex,ey """
+		return abs(px - ex) < 25 and 5 < py - ey < 20
+
+	def stomp(self, x, y):
+		""" rewards killing an enemy at given position: bounces and spawns a death animation """
+		game.world.add_timer(5)
+		self.set_bounce()
+		game.effects.spawn(x, y - 10, self.spriteset_death, self.seq_death)
+		game.sounds.play("crush", 2)
+
 	def check_hit(self, x, y, direction):
 		""" returns if get hurt by enemy at select position and direction"""
 		if self.immunity is 0 and self.rectangle.check_point(x, y):
@@ -265,13 +287,8 @@ class Player(Actor):
 
 		# update immunity
 		if self.immunity is not 0:
-			pal_index0 = (self.immunity >> 2) & 1
 			self.immunity -= 1
-			pal_index1 = (self.immunity >> 2) & 1
-			if self.immunity is 0:
-				pal_index1 = 0
-			if pal_index0 != pal_index1:
-				self.sprite.set_palette(self.palettes[pal_index1])
+			self.flash.apply(self.flash_ramp[FLASH_WAVE[self.immunity & 7]])
 
 		# update sprite facing
 		self.update_direction()
@@ -291,8 +308,8 @@ class Player(Actor):
 		# clip to game.world limits
 		if self.x < 0.0:
 			self.x = 0.0
-		elif self.x > game.world.foreground.width - self.width:
-			self.x = game.world.foreground.width	- self.width
+		elif self.x > game.world.width - self.width:
+			self.x = game.world.width - self.width
 
 		# check and fix 4-way collisions depending on motion direction
 		intx = int(self.x)
@@ -310,5 +327,6 @@ class Player(Actor):
 
 		if self.x != oldx or self.y != oldy:
 			self.rectangle.update_position(int(self.x), int(self.y))
+			game.player_grid.update(self, self.rectangle)
 			self.sprite.set_position(int(self.x) - game.world.x, int(self.y))
 		return True
@@ -0,0 +1,43 @@
+""" Fixed-size pools of short-lived actors (effects, pop-up scores) re-armed in place """
+
+import game
+
+PARK_POSITION = (-128, -128)	# off-screen spot for idle pooled sprites
+
+class ActorPool(object):
+	""" Pre-built actors of a given class with sprites reserved at startup. spawn() re-arms
+	an idle one, or recycles the oldest active one if all are busy, so burst events don't
+	allocate anything. The class must implement arm() with the spawn parameters """
+
+	def __init__(self, actor_class, size):
+		sprites = game.sprites.reserve(actor_class.category, size)
+		self.idle = [actor_class(self, sprite) for sprite in sprites]
+		self.active = dict()
+		for actor in self.idle:
+			actor.sprite.set_position(*PARK_POSITION)
+
+	def spawn(self, *args):
+		""" arms and activates a pooled actor, returns it """
+		if self.idle:
+			actor = self.idle.pop()
+		else:
+			actor = next(iter(self.active))
+			game.actors.remove(actor)
+			del self.active[actor]
+		actor.arm(*args)
+		self.active[actor] = None
+		game.actors.add(actor)
+		return actor
+
+	def recycle(self, actor):
+		""" parks actor sprite off-screen and returns it to the idle list """
+		if actor in self.active:
+			del self.active[actor]
+			actor.sprite.set_position(*PARK_POSITION)
+			self.idle.append(actor)
+
+	def clear(self):
+		""" deactivates all active actors, i.e. when restarting the game """
+		for actor in tuple(self.active):
+			game.actors.remove(actor)
+			actor.release()
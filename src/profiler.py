@@ -0,0 +1,131 @@
+"""
+Opt-in per-frame profiler. Records frame time split by phase (window draw, raster
+callback, actor updates by class) and the number of calls into the native library.
+Records are kept in a ring buffer that can be dumped to CSV or JSON, and a summary
+is shown on the UI layer
+"""
+
+import csv
+import json
+from collections import deque
+from time import perf_counter
+import tilengine
+import game
+
+class CountingLibrary(object):
+	""" proxy of the native library that counts calls to its functions """
+	def __init__(self, library):
+		self.library = library
+		self.calls = 0
+
+	def __getattr__(self, name):
+		function = getattr(self.library, name)
+		if not callable(function):
+			return function
+
+		def counted(*args):
+			self.calls += 1
+			return function(*args)
+
+		# cache wrapper so next lookups don't reach __getattr__
+		setattr(self, name, counted)
+		return counted
+
+
+class Profiler(object):
+	""" per-frame timings ring buffer """
+	overlay_interval = 30
+
+	def __init__(self, capacity=3600):
+		self.records = deque(maxlen=capacity)
+		self.library = None
+		self.record = None
+		self.t0 = 0
+		self.calls0 = 0
+		self.raster_time = 0.0
+		self.num_frame = 0
+
+	def install(self):
+		""" counts native calls from now on. Call before creating the engine """
+		self.library = CountingLibrary(tilengine._tln)
+		tilengine._tln = self.library
+
+	def attach(self, engine):
+		""" times the raster program of the engine """
+		run = engine.raster_table.run
+
+		def timed_run(line):
+			t0 = perf_counter()
+			run(line)
+			self.raster_time += perf_counter() - t0
+
+		engine.set_raster_callback(timed_run)
+
+	def process(self):
+		""" replaces game.window.process() in main loop: closes previous frame and times drawing """
+		now = perf_counter()
+		if self.record is not None:
+			self.end_frame(now)
+		self.t0 = now
+		self.raster_time = 0.0
+		self.calls0 = self.library.calls if self.library is not None else 0
+		self.record = dict(frame=self.num_frame)
+		self.num_frame += 1
+		active = game.window.process()
+		self.record["draw"] = (perf_counter() - now) * 1000
+		self.record["raster"] = self.raster_time * 1000
+		return active
+
+	def update_actor(self, actor):
+		""" replaces actor.update() in main loop, accumulates time by actor class """
+		t0 = perf_counter()
+		alive = actor.update()
+		elapsed = (perf_counter() - t0) * 1000
+		name = type(actor).__name__
+		self.record[name] = self.record.get(name, 0.0) + elapsed
+		return alive
+
+	def end_frame(self, now):
+		""" stores current frame record """
+		record = self.record
+		record["total"] = (now - self.t0) * 1000
+		if self.library is not None:
+			record["native_calls"] = self.library.calls - self.calls0
+		self.records.append(record)
+		if self.num_frame % self.overlay_interval == 0:
+			self.show_overlay()
+
+	def show_overlay(self):
+		""" shows average frame time (tenths of ms) and native calls on the UI layer """
+		records = list(self.records)[-self.overlay_interval:]
+		total = sum(record["total"] for record in records) / len(records)
+		calls = sum(record.get("native_calls", 0) for record in records) // len(records)
+		game.ui.print_number(1, "{:04}".format(min(int(total * 10), 9999)))
+		game.ui.print_number(game.ui.cols - 5, "{:04}".format(min(calls, 9999)))
+
+	def columns(self):
+		""" returns list of column names present in records """
+		names = set()
+		for record in self.records:
+			names.update(record)
+		fixed = ["frame", "total", "draw", "raster", "native_calls"]
+		return fixed + sorted(names.difference(fixed))
+
+	def dump_csv(self, filename):
+		""" writes records to CSV file, times in milliseconds """
+		with open(filename, "w", newline="") as csv_file:
+			writer = csv.DictWriter(csv_file, self.columns(), restval=0)
+			writer.writeheader()
+			writer.writerows(self.records)
+
+	def dump_json(self, filename):
+		""" writes records to JSON file, times in milliseconds """
+		with open(filename, "w") as json_file:
+			json.dump(list(self.records), json_file, indent=1)
+
+	def dump(self, filename):
+		""" writes records to CSV or JSON depending on file extension """
+		if filename.endswith(".json"):
+			self.dump_json(filename)
+		else:
+			self.dump_csv(filename)
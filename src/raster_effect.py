@@ -2,9 +2,12 @@
 Demonstrates raster effects for tilengine:
 - linescroll for medium layer
 - gradient color for sky
+
+Effects are precomputed into a RasterTable that is only rebuilt when the world
+scroll or the clouds position change, so each scanline is just a table lookup
 """
 
-from tilengine import Color
+from tilengine import Color, RasterTable
 import game
 
 # sky gradient color
@@ -21,25 +24,38 @@ def interpolate_color(x, x1, x2, color1, color2):
 	b = lerp(x, x1, x2, color1.b, color2.b)
 	return Color(r, g, b)
 
-def raster_effect(line):
-	""" raster effect callback, called every rendered scanline """
-
-	# sky color gradient
-	if 0 <= line <= 128:
-		color = interpolate_color(line, 0, 128, SKY_COLORS[0], SKY_COLORS[1])
-		game.engine.set_background_color(color)
-
-	# sets cloud position at frame start
-	if line == 0:
-		game.world.background.set_position(int(game.world.clouds), 0)
-
-	# linescroll on main background
-	elif 160 <= line <= 208:
-		pos1 = game.world.x//10
-		pos2 = game.world.x//3
-		xpos = lerp(line, 160, 208, pos1, pos2)
-		game.world.background.set_position(xpos, 0)
-
-	# bottom background
-	elif line == 256:
-		game.world.background.set_position(game.world.x//2, 0)
+class RasterEffect(object):
+	""" raster program for sky and background layer """
+	def __init__(self):
+		self.table = RasterTable(game.HEIGHT)
+		self.x = None
+		self.clouds = None
+
+		# sky color gradient, static
+		for line in range(0, 129):
+			color = interpolate_color(line, 0, 128, SKY_COLORS[0], SKY_COLORS[1])
+			self.table.set_background_color(line, color)
+		self.table.commit()
+
+	def update(self):
+		""" updates layer positions when world has scrolled, once per frame """
+		world = game.world
+		clouds = int(world.clouds)
+
+		# sets cloud position at frame start
+		if clouds != self.clouds:
+			self.clouds = clouds
+			self.table.set_layer_position(0, world.background, clouds, 0)
+
+		if world.x != self.x:
+			self.x = world.x
+
+			# linescroll on main background
+			pos1 = world.x//10
+			pos2 = world.x//3
+			for line in range(160, 209):
+				xpos = lerp(line, 160, 208, pos1, pos2)
+				self.table.set_layer_position(line, world.background, xpos, 0)
+
+			# bottom background
+			self.table.set_layer_position(256, world.background, world.x//2, 0)
@@ -16,3 +16,7 @@ class Rectangle(object):
 	def check_point(self, x, y):
 		""" returns if point is contained in rectangle """
 		return self.x1 <= x <= self.x2 and self.y1 <= y <= self.y2
+
+	def check_overlap(self, x1, y1, x2, y2):
+		""" returns if another rectangle given by its corners overlaps this one """
+		return self.x1 <= x2 and x1 <= self.x2 and self.y1 <= y2 and y1 <= self.y2
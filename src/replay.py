@@ -0,0 +1,185 @@
+"""
+Deterministic input recording and replay. While recording, each frame stores the state of
+the inputs queried by the game, the frame clock and a hash of the game state into a compact
+binary log. Replay feeds the log back, headless or windowed, and reports the first frame
+whose state hash differs from the recorded one
+
+Record with python platformer.py --record FILE, or python headless.py --record FILE
+
+Usage: python replay.py FILE [--window]
+"""
+
+import argparse
+from struct import Struct
+from zlib import crc32
+from tilengine import Input
+import game
+
+MAGIC = b"TLNR"
+VERSION = 2
+HEADER = Struct("<4sHHI")	# magic, version, flags, number of frames
+RECORD = Struct("<IQI")		# ticks, inputs bitmask, state hash
+STATE = Struct("<ii")
+POSITION = Struct("<dd")
+PLAYER = Struct("<ddddi")
+
+# header flags
+HASH_FRAMEBUFFER = 1 << 0
+SWARMS = 1 << 1
+
+PLAYER_INPUTS = Input.CRT + 1	# inputs of each player, their ids are Input.P2 apart
+
+def input_bit(input_id):
+	""" returns bit of an input in the inputs bitmask, inputs of all players packed together """
+	player, input_id = divmod(input_id, Input.P2)
+	return 1 << (player*PLAYER_INPUTS + input_id)
+
+def state_hash(framebuffer=None):
+	""" returns crc32 of world, player and actors state, and optionally of the framebuffer """
+	world = game.world
+	player = game.player
+	crc = crc32(STATE.pack(int(world.x), world.time))
+	crc = crc32(PLAYER.pack(player.x, player.y, player.xspeed, player.yspeed, player.state), crc)
+	for actor in game.actors:
+		fields = getattr(actor, "fields", None)
+		if fields is not None:
+			for name in fields:
+				crc = crc32(getattr(actor, name)[:actor.count].tobytes(), crc)
+		elif actor is not world and actor is not player and hasattr(actor, "x"):
+			crc = crc32(POSITION.pack(actor.x, actor.y), crc)
+	if framebuffer is not None:
+		crc = crc32(framebuffer, crc)
+	return crc
+
+
+class ReplayLog(object):
+	""" recorded session: header flags and one (ticks, inputs, hash) record per frame """
+	def __init__(self, flags=0):
+		self.flags = flags
+		self.records = list()
+
+	def __len__(self):
+		return len(self.records)
+
+	def save(self, filename):
+		with open(filename, "wb") as file:
+			file.write(HEADER.pack(MAGIC, VERSION, self.flags, len(self.records)))
+			file.write(b"".join(RECORD.pack(*record) for record in self.records))
+
+	@classmethod
+	def load(cls, filename):
+		with open(filename, "rb") as file:
+			data = file.read()
+		magic, version, flags, count = HEADER.unpack_from(data)
+		if magic != MAGIC or version != VERSION:
+			raise ValueError("%s is not a replay log" % filename)
+		log = cls(flags)
+		log.records = list(RECORD.iter_unpack(data[HEADER.size:HEADER.size + count*RECORD.size]))
+		return log
+
+
+class RecordingWindow(object):
+	""" window wrapper that freezes input and ticks once per frame and logs them """
+	def __init__(self, window, log):
+		self.window = window
+		self.log = log
+		self.hash_framebuffer = log.flags & HASH_FRAMEBUFFER
+		self.begin_frame()
+
+	def __getattr__(self, name):
+		return getattr(self.window, name)
+
+	def begin_frame(self):
+		self.ticks = None
+		self.inputs = 0
+		self.polled = 0
+
+	def get_input(self, input_id):
+		""" samples real input the first time it's queried in the frame """
+		bit = input_bit(input_id)
+		if not self.polled & bit:
+			self.polled |= bit
+			if self.window.get_input(input_id):
+				self.inputs |= bit
+		return self.inputs & bit != 0
+
+	def get_ticks(self):
+		""" samples real clock the first time it's queried in the frame """
+		if self.ticks is None:
+			self.ticks = self.window.get_ticks()
+		return self.ticks
+
+	def process(self):
+		""" draws frame and logs it """
+		active = self.window.process()
+		framebuffer = self.window.framebuffer.view if self.hash_framebuffer else None
+		self.log.records.append((self.get_ticks(), self.inputs, state_hash(framebuffer)))
+		self.begin_frame()
+		return active
+
+
+class ReplayWindow(object):
+	""" window wrapper that feeds input and ticks from a log and checks state hashes """
+	def __init__(self, window, log):
+		self.window = window
+		self.log = log
+		self.hash_framebuffer = log.flags & HASH_FRAMEBUFFER
+		self.frame = 0
+		self.divergence = None
+
+	def __getattr__(self, name):
+		return getattr(self.window, name)
+
+	def get_input(self, input_id):
+		return self.log.records[self.frame][1] & input_bit(input_id) != 0
+
+	def get_ticks(self):
+		return self.log.records[self.frame][0]
+
+	def process(self):
+		""" draws frame, compares state hash with recorded one. False at end of log """
+		active = self.window.process()
+		framebuffer = self.window.framebuffer.view if self.hash_framebuffer else None
+		if self.divergence is None and state_hash(framebuffer) != self.log.records[self.frame][2]:
+			self.divergence = self.frame
+		self.frame += 1
+		return active and self.frame < len(self.log)
+
+
+def replay(filename, windowed=False):
+	""" replays a log, returns number of frames played and first divergent frame or None """
+	from tilengine import Window
+	from headless import HeadlessWindow
+	import platformer
+
+	log = ReplayLog.load(filename)
+	if windowed and log.flags & HASH_FRAMEBUFFER:
+		raise ValueError("%s has framebuffer hashes, must be replayed headless" % filename)
+	platformer.init()
+	if log.flags & SWARMS:
+		platformer.start_swarms()
+	if windowed:
+		window = Window.create()
+	else:
+		window = HeadlessWindow()
+	game.window = ReplayWindow(window, log)
+	game.world.start()
+	while game.window.process():
+		platformer.update()
+	return game.window.frame, game.window.divergence
+
+def main():
+	parser = argparse.ArgumentParser(description="Replays a recorded session and checks its state")
+	parser.add_argument("file", help="replay log recorded with --record")
+	parser.add_argument("--window", action="store_true", help="replays in a window instead of headless")
+	args = parser.parse_args()
+
+	frames, divergence = replay(args.file, args.window)
+	if divergence is None:
+		print("%d frames replayed, no divergence" % frames)
+	else:
+		print("%d frames replayed, first divergence at frame %d" % (frames, divergence))
+		raise SystemExit(1)
+
+if __name__ == "__main__":
+	main()
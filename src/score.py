@@ -1,26 +1,36 @@
 """ Effect that shows pop-up score on player actions """
 
-from tilengine import Spriteset
-from actor import Actor
+from actor import Actor, SpriteCategory
 import game
 
-class Score(Actor):
-	def __init__(self, value, x, y):
+PICTURES = {5: 0, -5: 1, 1: 2}
 
-		# init class members once
-		if Score.spriteset is None:
-			Score.spriteset = Spriteset.fromfile("score")
+class Score(Actor):
+	""" pop-up score, pooled: spawn with game.scores.spawn() """
+	category = SpriteCategory.Score
 
-		Actor.__init__(self, None, int(x), int(y))
-		if value is 5:
-			self.sprite.set_picture(0)
-		elif value is -5:
-			self.sprite.set_picture(1)
-		elif value is 1:
-			self.sprite.set_picture(2)
+	def __init__(self, pool, sprite):
+		self.pool = pool
+		self.sprite = sprite
+		self.item = None
+		self.x = 0
+		self.y = 0
+		sprite.setup(game.assets.spritesets["score"])
 
+	def arm(self, value, x, y):
+		""" restarts pop-up with given value and position """
+		self.x = int(x)
+		self.y = int(y)
+		picture = PICTURES.get(value)
+		if picture is not None:
+			self.sprite.set_picture(picture)
 		self.t0 = game.window.get_ticks()
 		self.t1 = self.t0 + 1000
+		self.sprite.set_position(self.x - game.world.x, self.y)
+
+	def release(self):
+		""" returns pop-up to its pool """
+		self.pool.recycle(self)
 
 	def update(self):
 		now = game.window.get_ticks()
@@ -0,0 +1,83 @@
+"""
+Game session: one isolated game instance that owns an engine context and its own set of
+the shared instances of the game module. Several sessions can live in the same process,
+the active one is selected with activate() before running it
+"""
+
+from time import perf_counter
+from headless import HeadlessWindow
+from replay import state_hash
+import platformer
+import game
+
+# game module instances owned by each session
+STATE = ("engine", "window", "controls", "actors", "effects", "scores", "sprites", "ui",
+	"world", "levels", "activity", "raster", "player", "enemy_grid", "player_grid", "sounds", "assets", "profiler", "swarms")
+
+def reset():
+	""" clears game module instances, so a new session doesn't see the ones of another """
+	for name in STATE:
+		setattr(game, name, None if name in ("profiler", "swarms") else ())
+
+
+class Session(object):
+	""" headless game instance with injectable clock and input script """
+	def __init__(self, clock=None, script=None, swarms=False):
+		reset()
+		platformer.init()
+		if swarms:
+			platformer.start_swarms()
+		game.window = HeadlessWindow(clock, script)
+		game.world.start()
+		self.state = dict((name, getattr(game, name)) for name in STATE)
+		self.elapsed = 0.0
+
+	def activate(self):
+		""" makes this session the current one: engine context and game instances """
+		self.state["engine"].set_context()
+		for name, value in self.state.items():
+			setattr(game, name, value)
+
+	def restart(self):
+		""" starts a new game in place: first level again, player at its start, timer and gems
+		reset. Engine, window and preloaded resources are kept """
+		self.activate()
+		game.effects.clear()
+		game.scores.clear()
+		game.levels.restart()
+		game.player.reset(*game.world.level.info.start)
+		game.world.gems = 0
+		game.world.clouds = 0.0
+		game.world.start()
+		game.actors.flush()
+		game.window.inputs = frozenset()
+
+	def run(self, num_frames):
+		""" activates session and runs a number of frames """
+		self.activate()
+		process = game.window.process
+		t0 = perf_counter()
+		for n in range(num_frames):
+			process()
+			platformer.update()
+		self.elapsed += perf_counter() - t0
+
+	def result(self):
+		""" returns summary of session state """
+		self.activate()
+		return {
+			"frames": game.window.num_frame,
+			"elapsed": self.elapsed,
+			"time": game.world.time,
+			"x": game.player.x,
+			"hash": state_hash()
+		}
+
+	def close(self):
+		""" releases engine context and resources, session can't be used anymore """
+		self.activate()
+		if game.world.stream is not None:
+			game.world.stream.close()
+		game.assets.close()
+		reset()
+		self.state = None
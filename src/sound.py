@@ -1,5 +1,6 @@
 """ Sound effect helper """
 
+from ctypes import c_char
 from sdl2 import *
 from sdl2.sdlmixer import *
 
@@ -17,11 +18,16 @@ class Sound(object):
 			self.path = path + "/"
 
 	def __del__(self):
-		for s in self._sounds:
+		for s in self._sounds.values():
 			Mix_FreeChunk(s)
 
 	def load(self, name, file):
 		self._sounds[name] = Mix_LoadWAV((self.path + file).encode())
 
+	def load_buffer(self, name, data):
+		""" loads a sound from the contents of a wav file, i.e. an asset pack entry """
+		buffer = (c_char * len(data)).from_buffer(data)
+		self._sounds[name] = Mix_LoadWAV_RW(SDL_RWFromConstMem(buffer, len(data)), 1)
+
 	def play(self, name, channel):
 		Mix_PlayChannel(channel, self._sounds[name], 0)
@@ -0,0 +1,222 @@
+"""
+Chunked level streaming: a level layer is split offline into fixed-width column chunks
+on disk, and at runtime only a ring of chunks around the camera is kept in a tilemap a few
+screens wide. The layer wraps around the ring, so world coordinates are kept as they are.
+Chunks ahead of the camera are read by a background thread. Tile edits (picked gems) are
+kept apart and applied again when a chunk is reloaded
+
+Split a level with: python streaming.py ../assets/layer_foreground.tmx [--chunk-cols N]
+"""
+
+import os
+import json
+import argparse
+import threading
+from queue import Queue
+import xml.etree.ElementTree as ET
+from tilengine import Tilemap, Tileset, Tile
+from collision import CollisionMap
+
+VERSION = 1
+MANIFEST = "manifest.json"
+CHUNK_COLS = 16
+
+def chunks_path(file_name):
+	""" returns directory with chunks of a tmx file """
+	return file_name + ".chunks"
+
+def read_manifest(file_name):
+	""" returns manifest of the chunks of a tmx file, or None if missing or outdated """
+	try:
+		with open(os.path.join(chunks_path(file_name), MANIFEST)) as file:
+			manifest = json.load(file)
+		stat = os.stat(file_name)
+	except (OSError, ValueError):
+		return None
+	if manifest.get("version") != VERSION or manifest.get("mtime_ns") != stat.st_mtime_ns:
+		return None
+	return manifest
+
+def tileset_source(file_name):
+	""" returns file name of the first tileset referenced by a tmx file """
+	for event, element in ET.iterparse(file_name):
+		if element.tag == "tileset":
+			return element.get("source")
+	return None
+
+def read_chunk(directory, chunk, size):
+	""" returns (tiles, types) of a chunk of size tiles read from disk """
+	with open(os.path.join(directory, "%04d.bin" % chunk), "rb") as file:
+		data = file.read()
+	tiles = (Tile * size).from_buffer_copy(data)
+	return tiles, data[size * 4:]
+
+def read_chunks(file_name, manifest, view_width, tile_size=16):
+	""" returns dictionary of chunk: (tiles, types) of the chunks seen at the start of a level
+	and the next one. Makes no native calls, so it can run in a worker thread """
+	chunk_width = manifest["chunk_cols"] * tile_size
+	count = min((view_width - 1) // chunk_width + 3, manifest["chunks"])
+	directory = chunks_path(file_name)
+	size = manifest["rows"] * manifest["chunk_cols"]
+	return dict((chunk, read_chunk(directory, chunk, size)) for chunk in range(count))
+
+
+def split(file_name, layer, chunk_cols=CHUNK_COLS):
+	""" splits tilemap of a tmx file into chunks. layer is a free engine layer, used to read tile types """
+	tilemap = Tilemap.fromfile(os.path.basename(file_name))
+	layer.setup(tilemap)
+	terrain = CollisionMap.fromlayer(layer)
+	rows = tilemap.rows
+	directory = chunks_path(file_name)
+	os.makedirs(directory, exist_ok=True)
+	num_chunks = (tilemap.cols + chunk_cols - 1) // chunk_cols
+	for chunk in range(num_chunks):
+		col = chunk * chunk_cols
+		num_cols = min(chunk_cols, tilemap.cols - col)
+		tiles = (Tile * (rows * chunk_cols))()
+		types = bytearray(rows * chunk_cols)
+		block = tilemap.get_tiles(0, col, rows, num_cols)
+		block_types = terrain.region(col, num_cols)
+		for row in range(rows):
+			tiles[row*chunk_cols:row*chunk_cols + num_cols] = block[row*num_cols:(row + 1)*num_cols]
+			types[row*chunk_cols:row*chunk_cols + num_cols] = block_types[row*num_cols:(row + 1)*num_cols]
+		with open(os.path.join(directory, "%04d.bin" % chunk), "wb") as file:
+			file.write(bytes(tiles))
+			file.write(types)
+	manifest = {
+		"version": VERSION,
+		"mtime_ns": os.stat(file_name).st_mtime_ns,
+		"rows": rows,
+		"cols": tilemap.cols,
+		"chunk_cols": chunk_cols,
+		"chunks": num_chunks,
+		"tileset": tileset_source(file_name)
+	}
+	with open(os.path.join(directory, MANIFEST), "w") as file:
+		json.dump(manifest, file, indent=1)
+
+
+class ChunkLoader(object):
+	""" reads chunk files, in background for prefetched ones """
+	def __init__(self, directory, rows, chunk_cols, loaded=None):
+		self.directory = directory
+		self.size = rows * chunk_cols
+		self.loaded = dict(loaded or ())
+		self.pending = set()
+		self.requests = Queue()
+		self.thread = threading.Thread(target=self.run, daemon=True)
+		self.thread.start()
+
+	def read(self, chunk):
+		""" returns (tiles, types) of a chunk read from disk """
+		return read_chunk(self.directory, chunk, self.size)
+
+	def run(self):
+		while True:
+			chunk = self.requests.get()
+			if chunk is None:
+				break
+			self.loaded[chunk] = self.read(chunk)
+
+	def close(self):
+		""" stops background thread, pending reads are dropped """
+		self.requests.put(None)
+		self.thread.join()
+
+	def prefetch(self, chunk):
+		""" requests background read of a chunk """
+		if chunk not in self.pending and chunk not in self.loaded:
+			self.pending.add(chunk)
+			self.requests.put(chunk)
+
+	def get(self, chunk):
+		""" returns chunk data, prefetched or read now if not ready """
+		self.pending.discard(chunk)
+		data = self.loaded.pop(chunk, None)
+		if data is None:
+			data = self.read(chunk)
+		return data
+
+
+class LevelStream(object):
+	""" ring of chunks around the camera, with its tilemap and collision map """
+	def __init__(self, file_name, manifest, view_width, tile_size=16, chunks=None):
+		""" chunks is an optional dictionary of chunk data already read (see read_chunks) """
+		self.rows = manifest["rows"]
+		self.cols = manifest["cols"]
+		self.chunk_cols = manifest["chunk_cols"]
+		self.num_chunks = manifest["chunks"]
+		self.chunk_width = self.chunk_cols * tile_size
+		self.view_width = view_width
+		self.width = self.cols * tile_size
+		visible = (view_width + self.chunk_width - 1) // self.chunk_width + 1
+		self.slots = visible + 2
+		self.ring_cols = self.slots * self.chunk_cols
+		self.tileset = Tileset.fromfile(manifest["tileset"])
+		self.tilemap = Tilemap.create(self.rows, self.ring_cols, None, 0, self.tileset)
+		self.terrain = CollisionMap(self.rows, self.ring_cols, tile_size)
+		self.loader = ChunkLoader(chunks_path(file_name), self.rows, self.chunk_cols, chunks)
+		self.resident = [None] * self.slots
+		self.edits = dict()
+		self.first = None
+
+	@classmethod
+	def open(cls, file_name, view_width, tile_size=16):
+		""" returns stream of a tmx file, or None if it hasn't been split or is outdated """
+		manifest = read_manifest(file_name)
+		if manifest is None:
+			return None
+		return cls(file_name, manifest, view_width, tile_size)
+
+	def close(self):
+		""" stops background reads, once the level isn't played anymore """
+		self.loader.close()
+
+	def update(self, x):
+		""" keeps chunks around view at x resident, prefetches next ones """
+		first = x // self.chunk_width - 1
+		if first == self.first:
+			return
+		self.first = first
+		last = (x + self.view_width - 1) // self.chunk_width + 1
+		for chunk in range(max(first, 0), min(last, self.num_chunks - 1) + 1):
+			if self.resident[chunk % self.slots] != chunk:
+				self.load(chunk)
+		for chunk in (first - 1, last + 1):
+			if 0 <= chunk < self.num_chunks:
+				self.loader.prefetch(chunk)
+
+	def load(self, chunk):
+		""" copies chunk into its ring slot and applies its edits """
+		tiles, types = self.loader.get(chunk)
+		slot = chunk % self.slots
+		col = slot * self.chunk_cols
+		self.tilemap.set_tiles(0, col, self.rows, self.chunk_cols, tiles)
+		self.terrain.set_region(col, self.chunk_cols, types)
+		self.resident[slot] = chunk
+		for (row, chunk_col), (tile, tile_type) in self.edits.get(chunk, {}).items():
+			self.tilemap.set_tile(row, col + chunk_col, tile)
+			self.terrain.set_type(row, col + chunk_col, tile_type)
+
+	def set_tile(self, row, col, tile, tile_type):
+		""" changes tile at world position, kept when its chunk is reloaded. None tile erases """
+		chunk = col // self.chunk_cols
+		self.edits.setdefault(chunk, dict())[(row, col % self.chunk_cols)] = (tile, tile_type)
+		if self.resident[chunk % self.slots] == chunk:
+			self.tilemap.set_tile(row, col % self.ring_cols, tile)
+			self.terrain.set_type(row, col, tile_type)
+
+
+def main():
+	from tilengine import Engine
+	parser = argparse.ArgumentParser(description="Splits a tmx level layer into chunks for streaming")
+	parser.add_argument("file", help="tmx file")
+	parser.add_argument("--chunk-cols", type=int, default=CHUNK_COLS, help="columns per chunk")
+	args = parser.parse_args()
+
+	engine = Engine.create(64, 64, 1, 0, 0)
+	engine.set_load_path(os.path.dirname(args.file))
+	split(args.file, engine.layers[0], args.chunk_cols)
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,353 @@
+"""
+Alternative enemy system: all the enemies of one type are kept in parallel arrays
+(struct of arrays) and updated in a single pass by one actor, instead of one python
+object per enemy. Sprites are submitted in a single batch per swarm and frame.
+If NumPy is installed, big swarms compute motion, turnarounds and hit tests for all
+their enemies at once with array masks. Small ones, and all without NumPy, loop over the
+arrays: below MASKED_MIN_COUNT enemies the loop is faster than NumPy's per-call overhead.
+Enabled with the --swarm command line option
+"""
+
+from array import array
+from math import sin, radians
+from tilengine import Flags
+from actor import Direction, SpriteCategory
+import game
+
+try:
+	import numpy
+except ImportError:
+	numpy = None
+
+# eagle vertical wave, repeats every 90 frames
+WAVE = tuple(int(sin(radians(frame*4))*15) for frame in range(90))
+WAVE_ARRAY = numpy.array(WAVE, dtype=numpy.int32) if numpy is not None else None
+
+MASKED_MIN_COUNT = 32	# enemies from which array masks are faster than the loop (measured ~30)
+
+class Swarm(object):
+	""" base class for a set of enemies of the same type, stored in arrays """
+	size = (0, 0)
+	fields = ("x", "y", "xspeed", "direction", "index")
+
+	def __init__(self, capacity):
+		self.capacity = capacity
+		self.count = 0
+		for name in self.fields:
+			setattr(self, name, array("i", [0] * capacity))
+		# numpy views over the same memory, for the masked update
+		self.views = None
+		if numpy is not None:
+			self.views = dict((name, numpy.frombuffer(getattr(self, name), dtype=numpy.int32))
+				for name in self.fields)
+		self.sprites = [None] * capacity
+		self.items = [None] * capacity
+		self.sleeping = dict()
+		game.actors.add(self)
+
+	def spawn(self, item):
+		""" adds an enemy declared in world item. Returns False if swarm is full """
+		if self.count == self.capacity:
+			return False
+		sprite = game.sprites.allocate(item, SpriteCategory.Enemy)
+		if sprite is None:
+			return False
+		n = self.count
+		self.count += 1
+		sprite.setup(self.spriteset)
+		self.sprites[n] = sprite
+		self.items[n] = item
+		self.x[n] = item.x
+		self.y[n] = item.y - self.size[1]
+		self.direction[n] = Direction.Left
+		self.index[n] = sprite.index
+		self.init(n)
+		return True
+
+	def remove(self, n):
+		""" takes enemy n out of the arrays, filling the gap with the last one """
+		last = self.count - 1
+		for name in self.fields:
+			values = getattr(self, name)
+			values[n] = values[last]
+		self.sprites[n] = self.sprites[last]
+		self.items[n] = self.items[last]
+		self.sprites[last] = None
+		self.items[last] = None
+		self.count = last
+
+	def kill(self, n):
+		""" definitive kill of enemy n, removing from spawn-able item list too """
+		game.sprites.release(self.items[n], SpriteCategory.Enemy)
+		game.world.objects.remove(self.items[n])
+		self.remove(n)
+
+	def despawn(self, n):
+		""" removes enemy n and lets its item spawn again """
+		item = self.items[n]
+		game.sprites.release(item, SpriteCategory.Enemy)
+		item.alive = False
+		self.remove(n)
+
+	def sleep(self, n):
+		""" stops updating enemy n and disables its sprite, keeping its state and sprite slot """
+		item = self.items[n]
+		state = tuple(getattr(self, name)[n] for name in self.fields)
+		self.sprites[n].disable()
+		self.sleeping[item] = (int(self.x[n]), state, self.sprites[n])
+		self.remove(n)
+
+	def wake(self, item):
+		""" resumes a sleeping enemy. Returns False if swarm is full, it keeps sleeping then """
+		if self.count == self.capacity:
+			return False
+		x, state, sprite = self.sleeping.pop(item)
+		n = self.count
+		self.count += 1
+		for name, value in zip(self.fields, state):
+			getattr(self, name)[n] = value
+		self.sprites[n] = sprite
+		self.items[n] = item
+		sprite.setup(self.spriteset)
+		self.resume(n)
+		return True
+
+	def despawn_sleeping(self, item):
+		""" removes a sleeping enemy and lets its item spawn again """
+		del self.sleeping[item]
+		game.sprites.release(item, SpriteCategory.Enemy)
+		item.alive = False
+
+	def clear(self):
+		""" removes all enemies without killing them, i.e. when changing level """
+		for n in range(self.count):
+			game.sprites.release(self.items[n], SpriteCategory.Enemy)
+			self.sprites[n] = None
+			self.items[n] = None
+		self.count = 0
+		for item in self.sleeping:
+			game.sprites.release(item, SpriteCategory.Enemy)
+		self.sleeping.clear()
+
+	def get_players(self):
+		""" returns players on screen, that can hit or be hit """
+		x = game.world.x
+		return game.player_grid.query(x, 0, x + game.WIDTH, game.HEIGHT)
+
+	def check_stomp(self, n, players):
+		""" checks players jumping above enemy n. If so, kills it """
+		ex, ey = self.x[n] + self.size[0]/2, self.y[n]
+		for player in players:
+			if player.yspeed > 0:
+				rectangle = player.rectangle
+				px, py = rectangle.x1 + player.width/2, rectangle.y2
+				if player.check_stomp(px, py, ex, ey):
+					self.kill(n)
+					player.stomp(ex - self.size[0]/2, ey)
+					return True
+		return False
+
+	def check_stomps(self, players):
+		""" check_stomp() for all enemies at once: each falling player kills the first one below """
+		for player in players:
+			if player.yspeed <= 0 or self.count == 0:
+				continue
+			count = self.count
+			rectangle = player.rectangle
+			px, py = rectangle.x1 + player.width/2, rectangle.y2
+			dx = px - (self.views["x"][:count] + self.size[0]/2)
+			dy = py - self.views["y"][:count]
+			found = numpy.flatnonzero((numpy.abs(dx) < 25) & (dy > 5) & (dy < 20))
+			if len(found):
+				n = int(found[0])
+				x, y = int(self.x[n]), int(self.y[n])
+				self.kill(n)
+				player.stomp(x, y)
+
+	def submit(self, screen_x, y, direction):
+		""" sets position and facing of all sprites in one batch, from arrays of the whole swarm """
+		count = self.count
+		flags = numpy.where(direction == Direction.Right, Flags.FLIPX, 0)
+		batch = numpy.column_stack((self.views["index"][:count], screen_x, y, flags, numpy.full(count, -1)))
+		game.engine.sprites.apply(batch.ravel().tolist())
+
+	def update(self):
+		""" updates all enemies once per frame """
+		if self.views is not None and self.count >= MASKED_MIN_COUNT:
+			self.check_stomps(self.get_players())
+			if self.count:
+				self.update_masked()
+		else:
+			self.update_each()
+		return True
+
+
+class EagleSwarm(Swarm):
+	""" flying enemies, wave across screen """
+	size = (40, 40)
+	fields = Swarm.fields + ("base_y", "frame")
+	collision_points = (4, 20, 36)
+
+	def __init__(self, capacity=8):
+		self.spriteset = game.assets.spritesets["enemy_eagle"]
+		self.seq_fly = game.assets.sequences["fly"]
+		Swarm.__init__(self, capacity)
+
+	def init(self, n):
+		self.base_y[n] = self.y[n]
+		self.xspeed[n] = -3
+		self.frame[n] = 0
+		self.resume(n)
+
+	def resume(self, n):
+		self.sprites[n].set_animation(self.seq_fly, 0)
+
+	def update_each(self):
+		""" updates eagles one by one """
+		world_x = game.world.x
+		players = self.get_players()
+		x, y, base_y, xspeed = self.x, self.y, self.base_y, self.xspeed
+		frame, direction, index = self.frame, self.direction, self.index
+		width, height = self.size
+		batch = list()
+		n = 0
+		while n < self.count:
+			if players and self.check_stomp(n, players):
+				continue
+			x[n] += xspeed[n]
+			y[n] = base_y[n] + WAVE[frame[n] % 90]
+			frame[n] += 1
+			if frame[n] == 10:
+				game.sounds.play("eagle", 3)
+			screen_x = x[n] - world_x
+
+			# turn around at screen limits, or check hit with the front side
+			if direction[n] == Direction.Left:
+				turn = screen_x < 10
+				front = x[n]
+			else:
+				turn = screen_x > 590
+				front = x[n] + width
+			if turn:
+				direction[n] = Direction.Right if direction[n] == Direction.Left else Direction.Left
+				xspeed[n] = -xspeed[n]
+				game.sounds.play("eagle", 3)
+			else:
+				for player in players:
+					rectangle = player.rectangle
+					if rectangle.check_overlap(front, y[n], front, y[n] + height):
+						for point in self.collision_points:
+							player.check_hit(front, y[n] + point, direction[n])
+
+			flags = Flags.FLIPX if direction[n] == Direction.Right else 0
+			batch.extend((index[n], screen_x, y[n], flags, -1))
+			n += 1
+		game.engine.sprites.apply(batch)
+
+	def update_masked(self):
+		""" updates all eagles at once with array operations """
+		count = self.count
+		x, y, base_y, xspeed, frame, direction = (self.views[name][:count]
+			for name in ("x", "y", "base_y", "xspeed", "frame", "direction"))
+		width, height = self.size
+		x += xspeed
+		y[:] = base_y + WAVE_ARRAY[frame % 90]
+		frame += 1
+		if (frame == 10).any():
+			game.sounds.play("eagle", 3)
+		screen_x = x - game.world.x
+
+		# turn around at screen limits, or check hit with the front side
+		left = direction == Direction.Left
+		turn = numpy.where(left, screen_x < 10, screen_x > 590)
+		front = numpy.where(left, x, x + width)
+		if turn.any():
+			direction[turn] ^= 1
+			xspeed[turn] *= -1
+			game.sounds.play("eagle", 3)
+		for player in self.get_players():
+			rectangle = player.rectangle
+			hits = ~turn & (rectangle.x1 <= front) & (front <= rectangle.x2) & \
+				(rectangle.y1 <= y + height) & (y <= rectangle.y2)
+			for n in numpy.flatnonzero(hits):
+				for point in self.collision_points:
+					player.check_hit(int(front[n]), int(y[n]) + point, int(direction[n]))
+
+		self.submit(screen_x, y, direction)
+
+
+class OpossumSwarm(Swarm):
+	""" floor enemies, chase player in a 80 pixel radius """
+	size = (36, 24)
+
+	def __init__(self, capacity=8):
+		self.spriteset = game.assets.spritesets["enemy_opossum"]
+		self.seq_walk = game.assets.sequences["walk"]
+		Swarm.__init__(self, capacity)
+
+	def init(self, n):
+		self.xspeed[n] = -2
+		self.resume(n)
+
+	def resume(self, n):
+		self.sprites[n].set_animation(self.seq_walk, 0)
+
+	def update_each(self):
+		""" updates opossums one by one """
+		world_x = game.world.x
+		player_x = game.player.x
+		players = self.get_players()
+		x, y, xspeed, direction, index = self.x, self.y, self.xspeed, self.direction, self.index
+		width, height = self.size
+		batch = list()
+		n = 0
+		while n < self.count:
+			if players and self.check_stomp(n, players):
+				continue
+			x[n] += xspeed[n]
+
+			# turn around out of chase radius, or check hit with the front side
+			if direction[n] == Direction.Left:
+				turn = x[n] - player_x < -80
+				front = x[n]
+			else:
+				turn = x[n] - player_x > 80
+				front = x[n] + width
+			if turn:
+				direction[n] = Direction.Right if direction[n] == Direction.Left else Direction.Left
+				xspeed[n] = -xspeed[n]
+			else:
+				front_y = y[n] + height//2
+				for player in players:
+					if player.rectangle.check_point(front, front_y):
+						player.check_hit(front, front_y, direction[n])
+
+			flags = Flags.FLIPX if direction[n] == Direction.Right else 0
+			batch.extend((index[n], x[n] - world_x, y[n], flags, -1))
+			n += 1
+		game.engine.sprites.apply(batch)
+
+	def update_masked(self):
+		""" updates all opossums at once with array operations """
+		count = self.count
+		x, y, xspeed, direction = (self.views[name][:count] for name in ("x", "y", "xspeed", "direction"))
+		width, height = self.size
+		x += xspeed
+
+		# turn around out of chase radius, or check hit with the front side
+		left = direction == Direction.Left
+		dx = x - game.player.x
+		turn = numpy.where(left, dx < -80, dx > 80)
+		front = numpy.where(left, x, x + width)
+		front_y = y + height//2
+		if turn.any():
+			direction[turn] ^= 1
+			xspeed[turn] *= -1
+		for player in self.get_players():
+			rectangle = player.rectangle
+			hits = ~turn & (rectangle.x1 <= front) & (front <= rectangle.x2) & \
+				(rectangle.y1 <= front_y) & (front_y <= rectangle.y2)
+			for n in numpy.flatnonzero(hits):
+				player.check_hit(int(front[n]), int(front_y[n]), int(direction[n]))
+
+		self.submit(x - game.world.x, y, direction)
@@ -427,19 +427,20 @@ class Engine(object):
 	Main object for engine creation and rendering
 
 	:ivar layers: tuple of Layer objects, one entry per layer
-	:ivar sprites: tuple of Sprite objects, one entry per sprite
+	:ivar sprites: :class:`SpriteList` tuple of Sprite objects, one entry per sprite
 	:ivar animations: tuple of Animation objects, one entry per animation
 	:ivar version: library version number
 	"""
 	def __init__(self, handle: c_void_p, num_layers: int, num_sprites: int, num_animations: int):
 		self._as_parameter_ = handle
 		self.layers = tuple([Layer(n) for n in range(num_layers)])
-		self.sprites = tuple([Sprite(n) for n in range(num_sprites)])
+		self.sprites = SpriteList([Sprite(n) for n in range(num_sprites)])
 		self.animations = tuple([Animation(n) for n in range(num_animations)])
 		self.version = _tln.TLN_GetVersion()
 		self.cb_raster_func = None
 		self.cb_frame_func = None
 		self.cb_blend_func = None
+		self.raster_table = None
 		self.library = _tln
 
 		version = [2,11,0]	# expected library version
@@ -470,6 +471,13 @@ class Engine(object):
 		else:
 			_raise_exception()
 
+	def set_context(self):
+		"""
+		Sets this engine as the current context, used by all later calls
+		"""
+		ok = _tln.TLN_SetContext(self)
+		_raise_exception(ok)
+
 	def __del__(self):
 		_tln.TLN_DeleteContext(self)
 
@@ -545,6 +553,26 @@ class Engine(object):
 			self.cb_raster_func = _video_callback_function(raster_callback)
 		_tln.TLN_SetRasterCallback(self.cb_raster_func)
 
+	def set_raster_table(self, raster_table: Optional["RasterTable"]):
+		"""
+		Enables raster effects driven by a precomputed :class:`RasterTable` instead of a user-defined function.
+		The per-scanline work is reduced to a table lookup and the native calls stored for that scanline.
+
+		:param raster_table: RasterTable object to run on each scanline. Set None to disable.
+
+		Example::
+
+			table = RasterTable(360)
+			table.set_background_color(0, Color(0,0,0))
+			table.commit()
+			engine.set_raster_table(table)
+		"""
+		self.raster_table = raster_table
+		if raster_table is None:
+			self.set_raster_callback(None)
+		else:
+			self.set_raster_callback(raster_table.run)
+
 	def set_frame_callback(self, frame_callback):
 		"""
 		Enables user callback for each drawn frame, like a virtual VBLANK interrupt
@@ -682,6 +710,106 @@ class Engine(object):
 		_tln.TLN_ReleaseWorld()
 
 
+class RasterTable(object):
+	"""
+	Precomputed raster program for :meth:`Engine.set_raster_table`. Holds the background color and
+	layer positions to set on each scanline, compiled into a table of native calls
+
+	:ivar num_lines: number of scanlines, usually the vertical resolution
+	:ivar program: list with a tuple of (function, arguments) native calls for each scanline
+	"""
+	def __init__(self, num_lines: int):
+		self.num_lines = num_lines
+		self.program = [()] * num_lines
+		self._colors = [None] * num_lines
+		self._positions = [None] * num_lines
+		self._dirty = set()
+
+	def set_background_color(self, line: int, color: Optional[Color]):
+		"""
+		Sets the background color at the start of the given scanline
+
+		:param line: scanline number
+		:param color: Color object to set, or None to leave the current color
+		"""
+		if color is not None:
+			self._colors[line] = (color.r, color.g, color.b)
+		else:
+			self._colors[line] = None
+		self._dirty.add(line)
+
+	def set_layer_position(self, line: int, layer: "Layer", x: int, y: int):
+		"""
+		Sets the position of a layer at the start of the given scanline
+
+		:param line: scanline number
+		:param layer: Layer object to move
+		:param x: horizontal position
+		:param y: vertical position
+		"""
+		positions = self._positions[line]
+		if positions is None:
+			positions = self._positions[line] = dict()
+		positions[layer.index] = (int(x), int(y))
+		self._dirty.add(line)
+
+	def set_layer_positions(self, first_line: int, layer: "Layer", xpos, y: int=0):
+		"""
+		Sets the horizontal position of a layer for a range of consecutive scanlines (linescroll)
+
+		:param first_line: scanline number of the first value
+		:param layer: Layer object to move
+		:param xpos: sequence of horizontal positions (list, tuple, array...), one per scanline
+		:param y: vertical position for all the scanlines
+		"""
+		for line, x in enumerate(xpos, first_line):
+			self.set_layer_position(line, layer, x, y)
+
+	def clear_layer_position(self, line: int, layer: "Layer"):
+		"""
+		Removes the position of a layer previously set on the given scanline
+
+		:param line: scanline number
+		:param layer: Layer object
+		"""
+		positions = self._positions[line]
+		if positions is not None and layer.index in positions:
+			del positions[layer.index]
+			self._dirty.add(line)
+
+	def commit(self):
+		"""
+		Compiles the scanlines modified since the last commit and publishes the new program
+		in a single step, so the raster callback never sees a half-updated table
+		"""
+		if not self._dirty:
+			return
+		program = list(self.program)
+		set_background_color = _tln.TLN_SetBGColor
+		set_layer_position = _tln.TLN_SetLayerPosition
+		for line in self._dirty:
+			calls = list()
+			color = self._colors[line]
+			if color is not None:
+				calls.append((set_background_color, color))
+			positions = self._positions[line]
+			if positions:
+				for index, (x, y) in positions.items():
+					calls.append((set_layer_position, (index, x, y)))
+			program[line] = tuple(calls)
+		self._dirty.clear()
+		self.program = program
+
+	def run(self, line: int):
+		"""
+		Raster callback installed by :meth:`Engine.set_raster_table`, issues the calls of a scanline
+
+		:param line: scanline number
+		"""
+		for function, args in self.program[line]:
+			function(*args)
+
+
 # window management -----------------------------------------------------------
 _tln.TLN_CreateWindow.argtypes = [c_char_p, c_int]
 _tln.TLN_CreateWindow.restype = c_bool
@@ -1253,6 +1381,49 @@ class Tilemap(object):
 		ok = _tln.TLN_CopyTiles(self, src_row, src_col, num_rows, num_cols, dst_tilemap, dst_row, dst_col)
 		_raise_exception(ok)
 
+	def get_tiles(self, row: int=0, col: int=0, num_rows: Optional[int]=None, num_cols: Optional[int]=None) -> Array:
+		"""
+		Reads a rectangular block of tiles into a new array. The library doesn't expose tilemap
+		memory, so it's read cell by cell, but without creating one Tile object per cell
+
+		:param row: Starting row (vertical position) inside the tilemap, 0 by default
+		:param col: Starting column (horizontal position) inside the tilemap, 0 by default
+		:param num_rows: Number of rows to read, up to the bottom edge by default
+		:param num_cols: Number of columns to read, up to the right edge by default
+		:return: ctypes array of :class:`Tile` in row-major order. Supports the buffer protocol, \
+			i.e. memoryview(tiles).cast("B").cast("H") gives index, flags pairs
+		"""
+		if num_rows is None:
+			num_rows = self.rows - row
+		if num_cols is None:
+			num_cols = self.cols - col
+		tiles = (Tile * (num_rows * num_cols))()
+		get_tile = _tln.TLN_GetTilemapTile
+		size = sizeof(Tile)
+		address = addressof(tiles)
+		for r in range(num_rows):
+			for c in range(num_cols):
+				ok = get_tile(self, row + r, col + c, cast(address, POINTER(Tile)))
+				_raise_exception(ok)
+				address += size
+		return tiles
+
+	def set_tiles(self, row: int, col: int, num_rows: int, num_cols: int, tiles):
+		"""
+		Writes a rectangular block of tiles with a constant number of native calls, regardless of size
+
+		:param row: Starting row (vertical position) inside the tilemap
+		:param col: Starting column (horizontal position) inside the tilemap
+		:param num_rows: Number of rows to write
+		:param num_cols: Number of columns to write
+		:param tiles: ctypes array of :class:`Tile` in row-major order, or writable buffer \
+			with index, flags pairs of 16-bit values, i.e. array("H")
+		"""
+		if not isinstance(tiles, Array):
+			tiles = (Tile * (num_rows * num_cols)).from_buffer(tiles)
+		block = Tilemap.create(num_rows, num_cols, tiles)
+		block.copy_tiles(0, 0, num_rows, num_cols, self, row, col)
+
 	def __del__(self):
 		if self.owner:
 			ok = self.library.TLN_DeleteTilemap(self)
@@ -1331,6 +1502,19 @@ class Palette(object):
 		else:
 			_raise_exception()
 
+	def get_data(self, num_entries: int=256) -> Array:
+		"""
+		Gets direct access to the color entries, without copying. Writing to the array changes
+		the palette, which must be kept alive while the array is in use
+
+		:param num_entries: number of colors of the palette, 256 by default
+		:return: ctypes array of num_entries * 4 bytes, in BGRA order
+		"""
+		data = _tln.TLN_GetPaletteData(self, 0)
+		if not data:
+			_raise_exception()
+		return (c_ubyte * (num_entries * 4)).from_address(addressof(data.contents))
+
 	def set_color(self, entry: int, color: Color):
 		"""
 		Sets the RGB color value of a palette entry
@@ -2058,6 +2242,14 @@ class Sprite(object):
 		self.index = index
 		self._as_parameter_ = index
 		self.spriteset = None
+		self._reset_state()
+
+	def _reset_state(self):
+		# last state set, used by SpriteList.apply() to skip unchanged values. None = unknown
+		self._x = None
+		self._y = None
+		self._flags = None
+		self._picture = None
 
 	def setup(self, spriteset: Spriteset, flags: int=0):
 		"""
@@ -2068,6 +2260,8 @@ class Sprite(object):
 		"""
 		ok = _tln.TLN_ConfigSprite(self, spriteset, flags)
 		self.spriteset = spriteset
+		self._reset_state()
+		self._flags = flags
 		_raise_exception(ok)
 
 	def set_spriteset(self, spriteset: Spriteset):
@@ -2087,6 +2281,7 @@ class Sprite(object):
 		:param flags: Combination of defined :class:`Flag` values
 		"""
 		ok = _tln.TLN_SetSpriteFlags(self, flags)
+		self._flags = flags
 		_raise_exception(ok)
 		
 	def enable_flag(self, flag: int, value: bool=True):
@@ -2097,6 +2292,7 @@ class Sprite(object):
 		:param value: True to enable (default) or False to disable
 		"""
 		ok = _tln.TLN_EnableSpriteFlag(self, flag, value)
+		self._flags = None
 		_raise_exception(ok)
 
 	def set_pivot(self, u: float, v: float):
@@ -2117,6 +2313,8 @@ class Sprite(object):
 		:param y: Vertical position
 		"""
 		ok = _tln.TLN_SetSpritePosition(self, x, y)
+		self._x = x
+		self._y = y
 		_raise_exception(ok)
 
 	def set_world_position(self, x: int, y: int):
@@ -2139,10 +2337,12 @@ class Sprite(object):
 		param_type = type(picture)
 		if param_type is int:
 			ok = _tln.TLN_SetSpritePicture(self, picture)
+			self._picture = picture
 		elif param_type is str:
 			entry = _tln.TLN_FindSpritesetSprite(self.spriteset, picture)
 			if entry != -1:
 				ok = _tln.TLN_SetSpritePicture(self, entry)
+				self._picture = entry
 			else:
 				return
 		else:
@@ -2214,6 +2414,7 @@ class Sprite(object):
 		Disables the sprite so it is not drawn
 		"""
 		ok = _tln.TLN_DisableSprite(self)
+		self._reset_state()
 		_raise_exception(ok)
 
 	def get_palette(self) -> Palette:
@@ -2236,6 +2437,7 @@ class Sprite(object):
 		:param loop: number of times to repeat, 0=infinite
 		"""
 		ok = _tln.TLN_SetSpriteAnimation(self, sequence, loop)
+		self._picture = None
 		_raise_exception(ok)
 
 	def get_animation_state(self) -> bool:
@@ -2300,6 +2502,43 @@ class Sprite(object):
 		_raise_exception(ok)
 
 
+class SpriteList(tuple):
+	"""
+	Tuple of all the :class:`Sprite` objects of the engine, with batched state submission
+	"""
+	def apply(self, buffer):
+		"""
+		Sets position, flags and picture of many sprites in a single call. Values that haven't changed
+		since they were last set -by this method or by the Sprite setters- are skipped
+
+		:param buffer: flat sequence of integers (list, array...), 5 values per sprite: index, x, y, flags, picture. \
+			Use -1 as flags or picture to leave them untouched, i.e. for animated sprites
+
+		Example::
+
+			# move sprite 0 and flip sprite 3, keeping pictures
+			engine.sprites.apply([0, 10, 20, -1, -1,  3, 100, 80, Flags.FLIPX, -1])
+		"""
+		set_position = _tln.TLN_SetSpritePosition
+		set_flags = _tln.TLN_SetSpriteFlags
+		set_picture = _tln.TLN_SetSpritePicture
+		ok = True
+		values = iter(buffer)
+		for index, x, y, flags, picture in zip(values, values, values, values, values):
+			sprite = self[index]
+			if x != sprite._x or y != sprite._y:
+				ok = set_position(index, x, y) and ok
+				sprite._x = x
+				sprite._y = y
+			if flags != -1 and flags != sprite._flags:
+				ok = set_flags(index, flags) and ok
+				sprite._flags = flags
+			if picture != -1 and picture != sprite._picture:
+				ok = set_picture(index, picture) and ok
+				sprite._picture = picture
+		_raise_exception(ok)
+
+
 # color cycle animation engine ------------------------------------------------------------
 _tln.TLN_SetPaletteAnimation.argtypes = [c_int, c_void_p, c_void_p, c_bool]
 _tln.TLN_SetPaletteAnimation.restype = c_bool
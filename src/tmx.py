@@ -0,0 +1,149 @@
+"""
+Fast loader for TMX object layers. The file is streamed only until the requested object
+group has been read, and the result is cached in a binary sidecar file next to the TMX,
+invalidated when the TMX size or modification time change.
+Tile layers and tile types of tilesets can be decoded too, without native calls, so they can
+be read in a worker thread
+"""
+
+import os
+import sys
+import zlib
+import gzip
+import base64
+import struct
+from array import array
+from collections import namedtuple
+import xml.etree.ElementTree as ET
+
+CACHE_EXTENSION = ".objects"
+CACHE_MAGIC = b"TMXO"
+CACHE_VERSION = 1
+
+# magic, version, tmx size, tmx modification time (ns), first gid, layer name length, number of objects
+CACHE_HEADER = struct.Struct("<4sHQqiHI")
+
+GID_MASK = 0x1FFFFFFF		# tile id bits of a tmx gid, upper ones are flip flags
+FLIP_FLAGS = 0xE000		# tmx flip flags in upper half of gid, same bits as tilengine FLIPX, FLIPY, ROTATE
+
+# rows, cols, tiles as array("H") of index, flags pairs like tilengine Tile, file name of the
+# first tileset, and background color as 0xAARRGGBB
+TileLayer = namedtuple("TileLayer", ("rows", "cols", "tiles", "tileset", "background_color"))
+
+def parse_object_layer(file_name, layer_name, first_gid):
+	""" streams a tmx file and returns packed array of (type, x, y) of the tile objects
+	in the given object layer, or None if not found """
+	objects = None
+	for event, element in ET.iterparse(file_name, events=("start", "end")):
+		if event == "start":
+			if element.tag == "objectgroup" and element.get("name") == layer_name:
+				objects = array("i")
+			continue
+		if objects is not None:
+			if element.tag == "object":
+				gid = element.get("gid")
+				if gid is not None:
+					objects.extend((int(gid) - first_gid, int(element.get("x")), int(element.get("y"))))
+			elif element.tag == "objectgroup":
+				return objects
+		element.clear()
+	return None
+
+def read_cache(cache_name, key, layer_name):
+	""" returns cached objects array if cache matches key, or None """
+	try:
+		with open(cache_name, "rb") as cache_file:
+			data = cache_file.read()
+		header = CACHE_HEADER.unpack_from(data)
+	except (OSError, struct.error):
+		return None
+	name_length, count = header[-2:]
+	start = CACHE_HEADER.size + name_length
+	if header[:-2] != key or data[CACHE_HEADER.size:start] != layer_name:
+		return None
+	objects = array("i")
+	objects.frombytes(data[start:])
+	if len(objects) != count * 3:
+		return None
+	return objects
+
+def write_cache(cache_name, key, layer_name, objects):
+	""" writes objects array to cache file, silently ignored if not writable """
+	try:
+		with open(cache_name, "wb") as cache_file:
+			cache_file.write(CACHE_HEADER.pack(*(key + (len(layer_name), len(objects) // 3))))
+			cache_file.write(layer_name)
+			cache_file.write(objects.tobytes())
+	except OSError:
+		pass
+
+def read_object_layer(file_name, layer_name, first_gid):
+	""" returns packed array of (type, x, y) of the tile objects in the given object layer,
+	from cache when up to date. Returns None if layer is not found """
+	stat = os.stat(file_name)
+	key = (CACHE_MAGIC, CACHE_VERSION, stat.st_size, stat.st_mtime_ns, first_gid)
+	name = layer_name.encode()
+	cache_name = file_name + CACHE_EXTENSION
+	objects = read_cache(cache_name, key, name)
+	if objects is None:
+		objects = parse_object_layer(file_name, layer_name, first_gid)
+		if objects is not None:
+			write_cache(cache_name, key, name, objects)
+	return objects
+
+def decode_gids(data):
+	""" returns array of gids of the data element of a tmx tile layer """
+	encoding = data.get("encoding")
+	if encoding == "csv":
+		return array("I", (int(gid) for gid in data.text.split(",")))
+	if encoding != "base64":
+		raise ValueError("unsupported tmx layer encoding: %s" % encoding)
+	raw = base64.b64decode(data.text)
+	compression = data.get("compression")
+	if compression == "zlib":
+		raw = zlib.decompress(raw)
+	elif compression == "gzip":
+		raw = gzip.decompress(raw)
+	elif compression is not None:
+		raise ValueError("unsupported tmx layer compression: %s" % compression)
+	gids = array("I")
+	gids.frombytes(raw)
+	if sys.byteorder == "big":
+		gids.byteswap()
+	return gids
+
+def read_tile_layer(file_name, layer_name=None):
+	""" returns TileLayer of a tile layer (the first one by default) of a tmx file, with tile
+	indexes relative to the first tileset as tilengine loads them. Returns None if not found """
+	root = ET.parse(file_name).getroot()
+	tileset = root.find("tileset")
+	first_gid = int(tileset.get("firstgid"))
+	for layer in root.iter("layer"):
+		if layer_name is None or layer.get("name") == layer_name:
+			break
+	else:
+		return None
+	gids = decode_gids(layer.find("data"))
+	tiles = array("H", bytes(len(gids) * 4))
+	for n, gid in enumerate(gids):
+		if gid:
+			tiles[n*2] = (gid & GID_MASK) - first_gid + 1
+			tiles[n*2 + 1] = (gid >> 16) & FLIP_FLAGS
+	color = root.get("backgroundcolor")
+	background_color = 0
+	if color is not None:
+		background_color = int(color.lstrip("#"), 16)
+		if len(color.lstrip("#")) == 6:
+			background_color |= 0xFF000000
+	return TileLayer(int(layer.get("height")), int(layer.get("width")), tiles, tileset.get("source"),
+		background_color)
+
+def tile_types(file_name):
+	""" returns table of tile types by tile index, from "type" properties of a tsx file """
+	root = ET.parse(file_name).getroot()
+	types = bytearray(int(root.get("tilecount")))
+	for tile in root.iter("tile"):
+		for prop in tile.iter("property"):
+			if prop.get("name") == "type":
+				types[int(tile.get("id"))] = int(prop.get("value"))
+	return types
@@ -1,9 +1,8 @@
 """ world/play field game entity """
 
-import xml.etree.ElementTree as ET
-from tilengine import Tilemap, Spriteset, Sequence
-from effect import Effect
-from score import Score
+from bisect import bisect_left, bisect_right
+from tmx import read_object_layer
+from actor import SpriteCategory
 from eagle import Eagle
 from opossum import Opossum
 import game
@@ -13,6 +12,25 @@ class Tiles:
 	Empty, Floor, Gem, Wall, SlopeUp, SlopeDown, InnerSlopeUp, InnerSlopeDown = range(8)
 
 
+# height of floor inside slope tiles, indexed by horizontal offset
+SLOPE_HEIGHTS = {
+    Tiles.SlopeUp: tuple(16 - xoffset for xoffset in range(16)),
+    Tiles.SlopeDown: tuple(xoffset + 1 for xoffset in range(16))
+}
+
+
+class TileHit(object):
+    """ terrain info at a given position, same fields as tilengine TileInfo """
+    __slots__ = ("type", "row", "col", "xoffset", "yoffset")
+
+    def __init__(self):
+        self.type = Tiles.Empty
+        self.row = 0
+        self.col = 0
+        self.xoffset = 0
+        self.yoffset = 0
+
+
 class Medium:
     """ types of environments """
     Floor, Air, Ladder, Water = range(4)
@@ -31,6 +49,11 @@ class Item(object):
     def try_spawn(self, x):
         """ Tries to spawn an active game object depending on screen position and item type """
         if self.alive is False and x < self.x < x + game.WIDTH:
+            if game.swarms is not None and self.type in game.swarms:
+                self.alive = game.swarms[self.type].spawn(self)
+                return
+            if not game.sprites.can_allocate(SpriteCategory.Enemy):
+                return
             self.alive = True
             if self.type is Item.Eagle:
                 Eagle(self, self.x, self.y - Eagle.size[1])
@@ -38,42 +61,103 @@ class Item(object):
                 Opossum(self, self.x, self.y - Opossum.size[1])
 
 
+class ItemIndex(object):
+    """ Spawnable items sorted by x coordinate, to visit only the ones inside the screen """
+
+    def __init__(self, items):
+        self.items = sorted(items, key=lambda item: item.x)
+        self.xpos = [item.x for item in self.items]
+        self.range = (0, 0)
+        self.x = None
+
+    def __len__(self):
+        return len(self.items)
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def visible(self, x):
+        """ returns items inside screen range x < item.x < x + game.WIDTH """
+        if x != self.x:
+            self.x = x
+            self.range = (bisect_right(self.xpos, x), bisect_left(self.xpos, x + game.WIDTH))
+        return self.items[self.range[0]:self.range[1]]
+
+    def add(self, item):
+        """ inserts an item, keeping the index sorted """
+        index = bisect_right(self.xpos, item.x)
+        self.items.insert(index, item)
+        self.xpos.insert(index, item.x)
+        self.x = None
+
+    def remove(self, item):
+        """ removes an item so it doesn't spawn anymore """
+        index = bisect_left(self.xpos, item.x)
+        while self.items[index] is not item:
+            index += 1
+        del self.items[index]
+        del self.xpos[index]
+        self.x = None
+
+
 def load_objects(file_name, layer_name, first_gid):
     """ loads tiles in object layer from a tmx file.
     Returns list of Item objects """
-    tree = ET.parse(file_name)
-    root = tree.getroot()
-    for child in root.findall("objectgroup"):
-        name = child.get("name")
-        if name == layer_name:
-            item_list = list()
-            for item in child.findall("object"):
-                gid = item.get("gid")
-                if gid is not None:
-                    x = item.get("x")
-                    y = item.get("y")
-                    item_list.append(
-                        Item(int(gid) - first_gid, int(x), int(y)))
-            return item_list
-    return None
+    return create_items(read_object_layer(file_name, layer_name, first_gid))
+
+def create_items(objects):
+    """ returns list of Item objects from packed array of (type, x, y), None if no array """
+    if objects is None:
+        return None
+    values = iter(objects)
+    return [Item(item_type, x, y) for item_type, x, y in zip(values, values, values)]
 
 class World(object):
 	""" world/play field entity """
 
-	def __init__(self):
+	def __init__(self, level):
 		self.foreground = game.engine.layers[1]
 		self.background = game.engine.layers[2]
 		self.clouds = 0.0
-		self.foreground.setup(Tilemap.fromfile("layer_foreground.tmx"))
-		self.background.setup(Tilemap.fromfile("layer_background.tmx"))
-		self.spriteset_vanish = Spriteset.fromfile("effect_vanish")
-		self.seq_vanish = Sequence.create_sprite_sequence(self.spriteset_vanish, "vanish", 4)
+		self.gems = 0
+		self.spriteset_vanish = game.assets.spritesets["effect_vanish"]
+		self.seq_vanish = game.assets.sequences["vanish"]
+		self.stream = None
+		self.set_level(level)
+		game.actors.add(self)
+
+	def set_level(self, level):
+		""" sets loaded level (see levels.py), removing enemies of the previous one """
+		for enemy in game.actors.group("enemies"):
+			game.actors.remove(enemy)
+			game.enemy_grid.remove(enemy)
+			enemy.release()
+		if game.swarms is not None:
+			for swarm in game.swarms.values():
+				swarm.clear()
+		if game.activity:
+			game.activity.clear()
+
+		# foreground is streamed by chunks if the level has been split, else loaded whole
+		if self.stream is not None:
+			self.stream.close()
+		self.level = level
+		self.stream = level.stream
+		if self.stream is not None:
+			self.foreground.setup(self.stream.tilemap)
+		else:
+			self.foreground.setup(level.foreground)
+		self.background.setup(level.background)
+		self.terrain = level.terrain
+		self.objects = level.objects
 		self.x = 0
-		self.x_max = self.foreground.width - game.WIDTH
-		self.objects = load_objects(game.ASSETS_PATH +
-			"/layer_foreground.tmx", "Capa de Objetos 1", 973)
-		game.engine.set_background_color(self.background.tilemap)
-		game.actors.append(self)
+		self.width = level.width
+		self.x_max = level.width - game.WIDTH
+		self.foreground.set_position(0, 0)
+		self.background.set_position(0, 0)
+		game.engine.set_background_color(level.background)
+		if game.player:
+			game.player.place(*level.info.start)
 
 	def start(self):
 		self.time = 30
@@ -84,13 +168,17 @@ class World(object):
 		""" updates tilemap when player picks a gem """
 		for tile_info in tiles_list:
 			if tile_info.type is Tiles.Gem:
-				self.foreground.tilemap.set_tile(
-					tile_info.row, tile_info.col, None)
-				Effect(tile_info.col*16, tile_info.row*16,
+				if self.stream is not None:
+					self.stream.set_tile(tile_info.row, tile_info.col, None, Tiles.Empty)
+				else:
+					self.foreground.tilemap.set_tile(tile_info.row, tile_info.col, None)
+					self.terrain.set_type(tile_info.row, tile_info.col, Tiles.Empty)
+				game.effects.spawn(tile_info.col*16, tile_info.row*16,
 						self.spriteset_vanish, self.seq_vanish)
 				game.sounds.play("pickup", 1)
+				self.gems += 1
 				self.add_timer(1)
-				Score(1, tile_info.col*16, tile_info.row*16)
+				game.scores.spawn(1, tile_info.col*16, tile_info.row*16)
 				break
 
 	def add_timer(self, amount):
@@ -116,14 +204,22 @@ class World(object):
 			self.x = int(game.player.x - 240)
 		if self.x > self.x_max:
 			self.x = self.x_max
+		if game.levels:
+			if game.player.x > self.x_max + game.WIDTH - 32:
+				game.levels.advance()
+				return True
+			game.levels.update()
 		self.clouds += 0.1
 
 		if self.x is not oldx:
+			if self.stream is not None:
+				self.stream.update(self.x)
 			self.foreground.set_position(self.x, 0)
 			self.background.set_position(self.x/8, 0)
+		game.raster.update()
 
-		# spawn new entities from object list
-		for item in self.objects:
+		# spawn new entities from object list, only the ones on screen
+		for item in self.objects.visible(self.x):
 			item.try_spawn(self.x)
 
 		now = game.window.get_ticks()